@@ -1,7 +1,7 @@
 # File: database/postgres_handler.py
 
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2.extras import RealDictCursor, execute_values
 from psycopg2 import pool
 from datetime import datetime
 
@@ -87,24 +87,30 @@ class PostgresHandler:
             self.close()
         return None
 
+    _GRADING_RESULT_COLUMNS = (
+        "student_id", "professor_id", "course", "semester", "assignment_no", "question", "student_answer",
+        "language", "old_score", "new_score", "old_feedback", "new_feedback"
+    )
+    _GRADING_RESULT_UPSERT = '''
+        INSERT INTO grading_results (student_id, professor_id, course, semester, assignment_no, question,
+            student_answer, language, old_score, new_score, old_feedback, new_feedback, created_at)
+        VALUES {values}
+        ON CONFLICT (student_id, assignment_no, question) DO UPDATE
+            SET new_score = EXCLUDED.new_score, new_feedback = EXCLUDED.new_feedback, student_answer = EXCLUDED.student_answer,
+                language = EXCLUDED.language, course = EXCLUDED.course, semester = EXCLUDED.semester, professor_id = EXCLUDED.professor_id
+        RETURNING id{returning};
+        '''
+    _GRADING_RESULT_ROW = (
+        "(%(student_id)s, %(professor_id)s, %(course)s, %(semester)s, %(assignment_no)s, %(question)s, "
+        "%(student_answer)s, %(language)s, %(old_score)s, %(new_score)s, %(old_feedback)s, %(new_feedback)s, %(created_at)s)"
+    )
+
     def insert_or_update_grading_result(self, *args, **kwargs) -> int:
         self.connect()
         try:
             with self.conn.cursor() as cur:
-                sql = '''
-                INSERT INTO grading_results (student_id, professor_id, course, semester, assignment_no, question,
-                    student_answer, language, old_score, new_score, old_feedback, new_feedback, created_at)
-                VALUES (%(student_id)s, %(professor_id)s, %(course)s, %(semester)s, %(assignment_no)s, %(question)s,
-                        %(student_answer)s, %(language)s, %(old_score)s, %(new_score)s, %(old_feedback)s, %(new_feedback)s, %(created_at)s)
-                ON CONFLICT (student_id, assignment_no, question) DO UPDATE
-                    SET new_score = EXCLUDED.new_score, new_feedback = EXCLUDED.new_feedback, student_answer = EXCLUDED.student_answer,
-                        language = EXCLUDED.language, course = EXCLUDED.course, semester = EXCLUDED.semester, professor_id = EXCLUDED.professor_id
-                RETURNING id;
-                '''
-                params = dict(zip([
-                    "student_id", "professor_id", "course", "semester", "assignment_no", "question", "student_answer",
-                    "language", "old_score", "new_score", "old_feedback", "new_feedback"
-                ], args))
+                sql = self._GRADING_RESULT_UPSERT.format(values=self._GRADING_RESULT_ROW, returning="")
+                params = dict(zip(self._GRADING_RESULT_COLUMNS, args))
                 params.update(kwargs)
                 params['created_at'] = datetime.now()
 
@@ -118,6 +124,50 @@ class PostgresHandler:
         finally:
             self.close()
 
+    def bulk_insert_or_update_grading_results(self, rows: list) -> list:
+        """
+        Upsert many grading results (dicts with insert_or_update_grading_result's
+        keyword arguments) in one transaction. Returns their ids in input order.
+        """
+        if not rows:
+            return []
+        now = datetime.now()
+        first, repeats, seen = [], [], set()
+        for i, row in enumerate(rows):
+            params = dict(row, created_at=now)
+            key = (str(params["student_id"]), str(params["assignment_no"]), str(params["question"]))
+            # One INSERT ... ON CONFLICT may not touch the same row twice, so repeated
+            # keys are upserted one by one after the batch, as sequential calls would.
+            (repeats if key in seen else first).append((i, key, params))
+            seen.add(key)
+
+        ids = [None] * len(rows)
+        self.connect()
+        try:
+            with self.conn.cursor() as cur:
+                returned = execute_values(
+                    cur,
+                    self._GRADING_RESULT_UPSERT.format(values="%s", returning=", student_id, assignment_no, question"),
+                    [params for _, _, params in first],
+                    template=self._GRADING_RESULT_ROW,
+                    page_size=len(first),
+                    fetch=True,
+                )
+                by_key = {(sid, ano, q): rid for rid, sid, ano, q in returned}
+                for i, key, _ in first:
+                    ids[i] = by_key[key]
+                one_sql = self._GRADING_RESULT_UPSERT.format(values=self._GRADING_RESULT_ROW, returning="")
+                for i, _, params in repeats:
+                    cur.execute(one_sql, params)
+                    ids[i] = cur.fetchone()[0]
+            self.conn.commit()
+            return ids
+        except Exception:
+            if self.conn: self.conn.rollback()
+            raise
+        finally:
+            self.close()
+
     def insert_grading_result(self, *args, **kwargs) -> int:
         return self.insert_or_update_grading_result(*args, **kwargs)
 
@@ -4,7 +4,7 @@
 from __future__ import annotations
 import os
 import json
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import logging
 
 # Streamlit is optional here; we guard imports.
@@ -99,14 +99,53 @@ class MultimodalVectorStore:
         _LOG.warning("All embedding backends unavailable. RAG will be disabled.")
 
     # ------------- Public API -------------
-    def add(self, doc_id: str, text: str, content_type: str, meta: Optional[Dict[str, Any]] = None) -> None:
+    def add(
+        self,
+        doc_id: str,
+        text: str,
+        content_type: str,
+        meta: Optional[Dict[str, Any]] = None,
+        q_ids: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Store one item. It is filed under meta["q_id"] (if present) and under every
+        id in `q_ids`, so material shared by several questions is stored (and
+        embedded) once while still showing up in each question's filtered search.
+        """
+        self._append(doc_id, text, content_type, meta, q_ids)
+        self._refit_tfidf()
+
+    def add_many(self, items: Iterable[Tuple[Any, ...]]) -> None:
+        """
+        Store several items at once. Each item is a tuple of add()'s arguments,
+        (doc_id, text, content_type[, meta[, q_ids]]). The TF-IDF backend is
+        refit once for the whole batch instead of once per item.
+        """
+        n = len(self.items)
+        for item in items:
+            self._append(*item)
+        if len(self.items) != n:
+            self._refit_tfidf()
+
+    # ------------- Internal storage -------------
+    def _append(
+        self,
+        doc_id: str,
+        text: str,
+        content_type: str,
+        meta: Optional[Dict[str, Any]] = None,
+        q_ids: Optional[Iterable[str]] = None,
+    ) -> None:
         meta = meta or {}
         rec = {"id": doc_id, "text": text or "", "type": content_type, "meta": meta}
         idx = len(self.items)
         self.items.append(rec)
         if "q_id" in meta:
             self.by_q.setdefault(str(meta["q_id"]), []).append(idx)
+        for q_id in q_ids or ():
+            self.by_q.setdefault(str(q_id), []).append(idx)
 
+    def _refit_tfidf(self) -> None:
         # Update TF-IDF matrix lazily if using that backend
         if self.backend == _BACKEND_TFIDF and self._tfidf_cls is not None:
             texts = [it["text"] for it in self.items]
@@ -211,7 +250,7 @@ class _DummyIndex:
 
 
 # ---------------- Public retrieval API ----------------
-def retrieve_multimodal_context(q_id: str, question: str, top_k: int = 5) -> Dict[str, Any]:
+def retrieve_multimodal_context(q_id: str, question: str, top_k: int = 5, vs: Optional["MultimodalVectorStore"] = None) -> Dict[str, Any]:
     """
     Return a dict shaped like:
     {
@@ -220,10 +259,11 @@ def retrieve_multimodal_context(q_id: str, question: str, top_k: int = 5) -> Dic
       "context_text": "...",
     }
     This function is SAFE: if the vector store isn’t available, it returns an empty payload.
+    Pass `vs` when calling from worker threads: they have no Streamlit session,
+    so the store can only be looked up from the script thread.
     """
     try:
-        vs = None
-        if st is not None:
+        if vs is None and st is not None:
             vs = st.session_state.get("multimodal_vs")
         if vs is None or not isinstance(vs, MultimodalVectorStore):
             return {"results": [], "context": [], "context_text": ""}
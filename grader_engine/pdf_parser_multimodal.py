@@ -32,7 +32,10 @@ def extract_multimodal_content_from_pdf(pdf_file: io.BytesIO) -> list:
                 content_blocks.append({
                     "page": page_num + 1,
                     "type": "image",
-                    "content": image_bytes  # Or a reference to the saved image
+                    "content": image_bytes,  # Or a reference to the saved image
+                    # pixel size from the PDF image dict, so renderers needn't decode it
+                    "width": base_image.get("width"),
+                    "height": base_image.get("height"),
                 })
 
             # Find and extract tables
@@ -1,4 +1,5 @@
 from typing import Dict
+import functools
 import re
 
 TYPES = ["mcq", "short", "essay", "math", "code", "table_reasoning", "diagram"]
@@ -7,7 +8,12 @@ def classify(question_text: str) -> Dict:
     """
     Heuristic router. You can swap this later with an LLM call.
     """
-    q = question_text or ""
+    # The same question is routed once per student; return a copy of the
+    # memoized result so callers can't mutate the cached dict.
+    return dict(_classify_cached(question_text or ""))
+
+@functools.lru_cache(maxsize=1024)
+def _classify_cached(q: str) -> Dict:
     ql = q.lower()
 
     # Defaults
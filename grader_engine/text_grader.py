@@ -10,16 +10,29 @@ import os
 import json
 import re
 import difflib
+import functools
+import importlib.util
+import threading
 from typing import List, Dict, Any, Optional, Tuple
 
+import numpy as np
 import torch
 from dotenv import load_dotenv
-from langchain_core.prompts import PromptTemplate
 from langchain.output_parsers import StructuredOutputParser, ResponseSchema
 from langchain_community.chat_models import ChatOllama
-from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
+from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig, StoppingCriteria, StoppingCriteriaList
 from peft import PeftModel
 
+try:
+    import orjson  # optional C-accelerated JSON
+except Exception:
+    orjson = None  # type: ignore
+
+try:
+    from rapidfuzz import process as rf_process, fuzz as rf_fuzz  # optional fuzzy matching
+except Exception:
+    rf_process = rf_fuzz = None  # type: ignore
+
 load_dotenv()
 
 # -----------------------------------------------------------------------------
@@ -32,6 +45,12 @@ OLLAMA_FALLBACK_MODEL = os.getenv("OLLAMA_MODEL", "mistral")
 # --- Fine-Tuned Model Configuration ---
 BASE_MODEL_NAME = "mistralai/Mistral-7B-v0.1"
 ADAPTER_PATH = os.path.join(os.path.dirname(__file__), '..', 'training', 'results', 'final_model')
+# Grading JSON is usually well under 300 tokens; leave headroom for long feedback.
+MAX_NEW_TOKENS = 384
+# "flash_attention_2" when flash-attn is installed, else PyTorch SDPA; override with GRADER_ATTN_IMPL.
+ATTN_IMPLEMENTATION = os.getenv("GRADER_ATTN_IMPL") or (
+    "flash_attention_2" if importlib.util.find_spec("flash_attn") is not None else "sdpa"
+)
 
 # -----------------------------------------------------------------------------
 # LLM OUTPUT SCHEMA
@@ -42,6 +61,17 @@ response_schemas = [
     ResponseSchema(name="feedback",      description="Textual feedback aligned with rubric")
 ]
 output_parser = StructuredOutputParser.from_response_schemas(response_schemas)
+# The schema never changes, so render the instructions once instead of per prompt.
+_FORMAT_INSTRUCTIONS = output_parser.get_format_instructions()
+
+_RE_CODE_FENCE = re.compile(r"^```(?:json)?|```$", re.MULTILINE)
+_RE_JSON_OBJ = re.compile(r"\{.*\}", re.DOTALL)
+
+# -----------------------------------------------------------------------------
+# JSON parsing (orjson when installed, stdlib json otherwise)
+# -----------------------------------------------------------------------------
+def _json_loads(s: str) -> Any:
+    return orjson.loads(s) if orjson is not None else json.loads(s)
 
 # -----------------------------------------------------------------------------
 # Helpers to handle blocks / strings uniformly
@@ -74,6 +104,15 @@ def _to_blocks(obj: Any) -> List[Dict[str, Any]]:
     return [{"type": "text", "content": str(obj)}]
 
 def _blocks_to_text(blocks: Any) -> str:
+    # Fast paths: plain strings and well-formed block lists skip the _to_blocks round-trip.
+    if isinstance(blocks, str):
+        return blocks.strip()
+    if isinstance(blocks, list):
+        try:
+            parts = [b["content"] or "" for b in blocks]
+        except (TypeError, KeyError):
+            parts = [(b.get("content") or "") for b in _to_blocks(blocks)]
+        return " ".join(parts).strip()
     return " ".join((b.get("content") or "") for b in _to_blocks(blocks)).strip()
 
 # -----------------------------------------------------------------------------
@@ -141,33 +180,57 @@ def _make_prompt(
 
     persona_text = (persona_instruction or "a strict grader. Grade the student's answer strictly by the provided rubric.").strip()
 
-    tmpl = PromptTemplate(
-        template=BASE_TEMPLATE,
-        input_variables=[
-            "language", "question", "ideal_answer", "persona_instruction",
-            "rubric_json", "student_answer", "exemplar_block",
-            "multimodal_context_block"
-        ],
-        partial_variables={"format_instructions": output_parser.get_format_instructions()},
-    )
-    return tmpl.format(
+    return BASE_TEMPLATE.format(
+        persona_instruction=persona_text,
         language=language,
         question=question,
         ideal_answer=ideal_answer,
         rubric_json=rubric_json,
         student_answer=student_answer,
         exemplar_block=exemplars_txt,
-        multimodal_context_block=multimodal_context_txt
+        multimodal_context_block=multimodal_context_txt,
+        format_instructions=_FORMAT_INSTRUCTIONS,
     )
 
 # -----------------------------------------------------------------------------
 # ROBUST PARSING + ALIGNMENT HELPERS
 # -----------------------------------------------------------------------------
+@functools.lru_cache(maxsize=64)
+def _rubric_json_cached(frozen: Tuple[Tuple[Tuple[str, type, Any], ...], ...]) -> str:
+    return json.dumps([{k: v for k, _, v in items} for items in frozen], ensure_ascii=False)
+
+def _rubric_json(rubric: List[Dict[str, Any]]) -> str:
+    """Serialize the rubric once per distinct rubric (bulk grading reuses the same one)."""
+    try:
+        # type(v) is part of the key: 5, 5.0 and True hash equal but serialize differently.
+        return _rubric_json_cached(tuple(tuple((k, type(v), v) for k, v in r.items()) for r in rubric))
+    except (AttributeError, TypeError):
+        # non-dict items or unhashable values (nested lists) -> no caching
+        return json.dumps(rubric, ensure_ascii=False)
+
 def _extract_json(raw: str) -> str:
-    cleaned = re.sub(r"^```(?:json)?|```$", "", raw.strip(), flags=re.MULTILINE).strip()
-    m = re.search(r"\{.*\}", cleaned, re.DOTALL)
+    cleaned = _RE_CODE_FENCE.sub("", raw.strip()).strip()
+    m = _RE_JSON_OBJ.search(cleaned)
     return m.group(0) if m else cleaned
 
+def _parse_grading_json(raw: str) -> Dict[str, Any]:
+    """Parse the model output; plain json first, LangChain's parser only as a fallback."""
+    m = _RE_JSON_OBJ.search(raw or "")
+    if m:
+        try:
+            parsed = _json_loads(m.group(0))
+            if isinstance(parsed, dict):
+                return parsed
+        except ValueError:
+            pass
+    try:
+        return output_parser.parse(raw)
+    except Exception:
+        try:
+            return _json_loads(_extract_json(raw))
+        except Exception:
+            return {}
+
 def _as_int(x, default: int = 0) -> int:
     try:
         if isinstance(x, (int, float)): return int(round(x))
@@ -175,6 +238,7 @@ def _as_int(x, default: int = 0) -> int:
     except Exception: pass
     return int(default)
 
+@functools.lru_cache(maxsize=4096)
 def _normalize(s: str) -> str:
     return re.sub(r"\s+", " ", (s or "").strip().lower())
 
@@ -199,21 +263,43 @@ def _align_and_clamp(
             keys.append(k)
             sanity["model_items_seen"] += 1
 
-    aligned: List[Dict[str, Any]] = []
-    for r in rubric:
-        crit, pts = r.get("criteria", ""), _as_int(r.get("points", 0), 0)
+    # Parallel arrays (criteria / max points / model scores) so the clamp is one vector op.
+    n = len(rubric)
+    crit_names = [r.get("criteria", "") for r in rubric]
+    max_pts = np.fromiter((_as_int(r.get("points", 0), 0) for r in rubric), dtype=np.int64, count=n)
+    scores = np.zeros(n, dtype=np.int64)
+    miss_idx: List[int] = []
+    miss_norm: List[str] = []
+    for i, crit in enumerate(crit_names):
         norm = _normalize(crit)
         if norm in mm:
-            sc = mm[norm]
+            scores[i] = mm[norm]
         else:
+            miss_idx.append(i)
+            miss_norm.append(norm)
+
+    # Fuzzy-match the leftovers: one rapidfuzz similarity matrix if available, difflib otherwise.
+    if miss_idx and keys and rf_process is not None:
+        sim = rf_process.cdist(miss_norm, keys, scorer=rf_fuzz.token_set_ratio,
+                               score_cutoff=fuzzy_cutoff * 100, workers=-1)
+        best = sim.argmax(axis=1)
+        for row, i in enumerate(miss_idx):
+            j = int(best[row])
+            if sim[row, j] > 0:
+                scores[i] = mm[keys[j]]
+            else:
+                sanity["unknown_criteria"].append(crit_names[i])
+    else:
+        for i, norm in zip(miss_idx, miss_norm):
             match = difflib.get_close_matches(norm, keys, n=1, cutoff=fuzzy_cutoff)
-            sc = mm.get(match[0], 0) if match else 0
-            if not match: sanity["unknown_criteria"].append(crit)
+            scores[i] = mm.get(match[0], 0) if match else 0
+            if not match: sanity["unknown_criteria"].append(crit_names[i])
 
-        if sc > pts: sanity["over_allocated"].append({"criteria": crit, "score": sc, "max": pts})
-        sc = max(0, min(sc, pts))
-        aligned.append({"criteria": crit, "score": sc})
+    for i in np.flatnonzero(scores > max_pts).tolist():
+        sanity["over_allocated"].append({"criteria": crit_names[i], "score": int(scores[i]), "max": int(max_pts[i])})
+    clamped = np.maximum(np.minimum(scores, max_pts), 0)
 
+    aligned = [{"criteria": c, "score": sc} for c, sc in zip(crit_names, clamped.tolist())]
     return aligned, sanity
 
 def _feedback_header(rubric: List[Dict[str, Any]], aligned: List[Dict[str, Any]], total: int) -> str:
@@ -223,19 +309,110 @@ def _feedback_header(rubric: List[Dict[str, Any]], aligned: List[Dict[str, Any]]
         lines.append(f"- {r.get('criteria','')}: {int(a.get('score',0))}/{_as_int(r.get('points',0))}")
     return "\n".join(lines)
 
-def _get_raw_prediction_finetuned(prompt: str) -> Tuple[str, str]:
-    model_id = f"{BASE_MODEL_NAME} (PEFT Adapters)"
+class JSONDoneCriteria(StoppingCriteria):
+    """Stop decoding once the generated text closes its outermost JSON object."""
+
+    def __init__(self, tokenizer, prompt_len: int):
+        self.tokenizer = tokenizer
+        self.seen = prompt_len      # tokens already accounted for (prompt braces are ignored)
+        self.open = 0
+        self.close = 0
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor, **kwargs) -> torch.BoolTensor:
+        new_ids = input_ids[0, self.seen:]
+        self.seen = input_ids.shape[1]
+        text = self.tokenizer.decode(new_ids, skip_special_tokens=True)
+        self.open += text.count("{")
+        self.close += text.count("}")
+        done = self.open == self.close > 0
+        return torch.full((input_ids.shape[0],), done, dtype=torch.bool, device=input_ids.device)
+
+_LOAD_LOCK = threading.Lock()
+
+def _load_finetuned():
+    """Load the 4-bit base model + PEFT adapters and tokenizer once per process."""
+    # lru_cache alone lets concurrent first callers (grading thread pools) each
+    # start loading the model; the lock makes them wait for the first load.
+    with _LOAD_LOCK:
+        return _load_finetuned_uncached()
+
+@functools.lru_cache(maxsize=1)
+def _load_finetuned_uncached():
     print(f"Loading fine-tuned model from {ADAPTER_PATH}...")
     bnb_config = BitsAndBytesConfig(load_in_4bit=True, bnb_4bit_quant_type="nf4", bnb_4bit_compute_dtype=torch.bfloat16, bnb_4bit_use_double_quant=False)
-    base_model = AutoModelForCausalLM.from_pretrained(BASE_MODEL_NAME, quantization_config=bnb_config, device_map="auto", trust_remote_code=True)
+    base_model = AutoModelForCausalLM.from_pretrained(
+        BASE_MODEL_NAME,
+        quantization_config=bnb_config,
+        device_map="auto",
+        torch_dtype=torch.bfloat16,
+        attn_implementation=ATTN_IMPLEMENTATION,
+        trust_remote_code=True,
+    )
     base_model.config.use_cache = False
     model = PeftModel.from_pretrained(base_model, ADAPTER_PATH)
     tokenizer = AutoTokenizer.from_pretrained(BASE_MODEL_NAME, trust_remote_code=True)
     tokenizer.pad_token = tokenizer.eos_token
-    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
-    output_sequences = model.generate(input_ids=inputs["input_ids"], max_new_tokens=1024)
-    raw_output = tokenizer.decode(output_sequences[0], skip_special_tokens=True)
-    return raw_output[len(prompt):].strip(), model_id
+    return model, tokenizer
+
+# Everything before this marker (persona, question, ideal answer, rubric, context)
+# is shared by all students answering the same question.
+_STUDENT_ANSWER_MARKER = "\nStudent Answer:\n"
+
+@functools.lru_cache(maxsize=32)
+def _encode_prefix(prefix: str) -> Tuple[int, ...]:
+    _, tokenizer = _load_finetuned()
+    return tuple(tokenizer(prefix)["input_ids"])
+
+@functools.lru_cache(maxsize=1)
+def _marker_ids() -> Tuple[int, ...]:
+    _, tokenizer = _load_finetuned()
+    return tuple(tokenizer(_STUDENT_ANSWER_MARKER, add_special_tokens=False)["input_ids"])
+
+# head -> whether split encoding matched a whole-prompt encode for that question
+_SPLIT_VERIFIED: Dict[str, bool] = {}
+
+def _encode_prompt(tokenizer, prompt: str) -> List[int]:
+    """
+    Token ids for `prompt`, reusing the cached ids of the per-question prefix.
+
+    The tail is encoded together with the marker and the marker's ids are
+    dropped, so SentencePiece doesn't add the dummy "▁" a standalone string
+    would get. The first prompt per question is checked against a whole-prompt
+    encode; if they differ, that question always uses the full encode.
+    """
+    head, sep, tail = prompt.partition(_STUDENT_ANSWER_MARKER)
+    if not sep or _SPLIT_VERIFIED.get(head) is False:
+        return tokenizer(prompt)["input_ids"]
+    marker = list(_marker_ids())
+    tail_ids = tokenizer(sep + tail, add_special_tokens=False)["input_ids"]
+    if tail_ids[:len(marker)] != marker:
+        return tokenizer(prompt)["input_ids"]
+    ids = list(_encode_prefix(head + sep)) + tail_ids[len(marker):]
+    if head not in _SPLIT_VERIFIED:
+        full = tokenizer(prompt)["input_ids"]
+        if len(_SPLIT_VERIFIED) >= 256:
+            _SPLIT_VERIFIED.clear()
+        _SPLIT_VERIFIED[head] = ids == full
+        return full
+    return ids
+
+def _get_raw_prediction_finetuned(prompt: str) -> Tuple[str, str]:
+    model_id = f"{BASE_MODEL_NAME} (PEFT Adapters)"
+    model, tokenizer = _load_finetuned()
+    input_ids = torch.tensor([_encode_prompt(tokenizer, prompt)], device=model.device)
+    prompt_len = input_ids.shape[1]
+    output_sequences = model.generate(
+        input_ids=input_ids,
+        attention_mask=torch.ones_like(input_ids),
+        max_new_tokens=MAX_NEW_TOKENS,
+        do_sample=False,
+        num_beams=1,
+        use_cache=True,
+        pad_token_id=tokenizer.eos_token_id,
+        stopping_criteria=StoppingCriteriaList([JSONDoneCriteria(tokenizer, prompt_len)]),
+    )
+    # decode only the generated continuation instead of slicing the prompt text off
+    return tokenizer.decode(output_sequences[0, prompt_len:], skip_special_tokens=True).strip(), model_id
 
 def _get_raw_prediction_ollama(prompt: str) -> Tuple[str, str]:
     model_id = OLLAMA_FALLBACK_MODEL
@@ -274,13 +451,13 @@ def grade_answer(
     # --- Normalize rubric to a list of {'criteria','points'} dicts
     try:
         if isinstance(rubric, str):
-            rubric = json.loads(rubric)
+            rubric = _json_loads(rubric)
     except Exception:
         pass
     if isinstance(rubric, dict) and "criteria" in rubric:
         rubric = rubric.get("criteria", [])
     rubric = rubric or []
-    rubric_json = json.dumps(rubric, ensure_ascii=False)
+    rubric_json = _rubric_json(rubric)
 
     # --- Normalize student answer to text
     if student_answer_blocks is not None:
@@ -317,14 +494,9 @@ def grade_answer(
             out["debug"] = {"model": "N/A", "prompt": prompt_str, "raw_output": str(e), "sanity": {"error": "invoke_failed"}}
         return out
 
-    parsed = {}
-    try:
-        parsed = output_parser.parse(raw)
-    except Exception:
-        try:
-            parsed = json.loads(_extract_json(raw))
-        except Exception:
-            parsed = {}
+    parsed = _parse_grading_json(raw)
+    if not isinstance(parsed, dict):
+        parsed = {}
 
     model_total = _as_int(parsed.get("total_score", 0), 0)
     model_breakdown = parsed.get("rubric_scores", []) or []
@@ -8,8 +8,10 @@ to your PDF code. It:
   - optional DB persistence stub.
 """
 from __future__ import annotations
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 import importlib
+import os
+import concurrent.futures
 from pathlib import Path
 
 from .manifest_adapter import build_items_from_ingest
@@ -98,20 +100,32 @@ def _grade_numeric(item: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
+def _option_masks(correct: List[Any], selected: List[Any]) -> Tuple[int, int]:
+    """Bit-pack option ids (one bit per distinct option) into (correct_mask, selected_mask)."""
+    bit: Dict[Any, int] = {}
+    correct_mask = selected_mask = 0
+    for opt in correct:
+        correct_mask |= bit.setdefault(opt, 1 << len(bit))
+    for opt in selected:
+        selected_mask |= bit.setdefault(opt, 1 << len(bit))
+    return correct_mask, selected_mask
+
+
 def _grade_mcq(item: Dict[str, Any]) -> Dict[str, Any]:
     question_id = item["question_id"]
     rubric = item.get("rubric_items", [])
-    correct = set((item.get("meta") or {}).get("mcq_correct", []))
-    selected = set((item.get("answer_mcq") or {}).get("selected", []))
+    correct = (item.get("meta") or {}).get("mcq_correct", []) or []
+    selected = (item.get("answer_mcq") or {}).get("selected", []) or []
+    correct_mask, selected_mask = _option_masks(correct, selected)
     max_score = sum(r["max_score"] for r in rubric) or 1
-    if not correct:
+    if not correct_mask:
         score = 0
-    elif len(correct) == 1:
-        score = max_score if selected == correct else 0
+    elif correct_mask.bit_count() == 1:
+        score = max_score if selected_mask == correct_mask else 0
     else:
-        tp = len(correct & selected)
-        fp = len(selected - correct)
-        fn = len(correct - selected)
+        tp = (correct_mask & selected_mask).bit_count()
+        fp = (selected_mask & ~correct_mask).bit_count()
+        fn = (correct_mask & ~selected_mask).bit_count()
         precision = tp / (tp + fp) if (tp + fp) else 0
         recall = tp / (tp + fn) if (tp + fn) else 0
         f1 = 2 * precision * recall / (precision + recall) if (precision + recall) else 0
@@ -121,7 +135,7 @@ def _grade_mcq(item: Dict[str, Any]) -> Dict[str, Any]:
         "type": "mcq",
         "rubric_scores": [{"criteria": (rubric[0]["criteria"] if rubric else "MCQ"), "score": score, "max_score": max_score}],
         "total_score": score,
-        "feedback": f"Correct={sorted(correct)}, Selected={sorted(selected)}"
+        "feedback": f"Correct={sorted(set(correct))}, Selected={sorted(set(selected))}"
     }
 
 
@@ -129,29 +143,67 @@ def build_items(ingest_manifest: Dict[str, Any], question_manifest: Dict[str, An
     return build_items_from_ingest(ingest_manifest=ingest_manifest, question_manifest=question_manifest)
 
 
-def grade_items(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    results = []
-    for it in items:
-        kind = _route_item(it)
-        if kind == "free_text":
-            res = _grade_free_text(it)
-        elif kind == "code":
-            res = _grade_code(it)
-        elif kind == "numeric":
-            res = _grade_numeric(it)
-        elif kind == "mcq":
-            res = _grade_mcq(it)
+_GRADERS = {
+    "free_text": _grade_free_text,
+    "code": _grade_code,
+    "numeric": _grade_numeric,
+    "mcq": _grade_mcq,
+}
+
+
+def _grade_one(it: Dict[str, Any]) -> Dict[str, Any]:
+    kind = _route_item(it)
+    grader = _GRADERS.get(kind)
+    if grader is not None:
+        res = grader(it)
+    else:
+        res = {
+            "question_id": it["question_id"],
+            "type": kind,
+            "rubric_scores": [],
+            "total_score": 0,
+            "feedback": "Unknown type."
+        }
+    res["question_id"] = it["question_id"]
+    res["_student_raw_folder"] = it["student"]["raw_folder"]
+    return res
+
+
+def grade_items(items: List[Dict[str, Any]], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Grade all items, preserving input order in the returned list.
+
+    Code items run in a process pool (sandboxed test runs are CPU-bound and
+    would otherwise serialize on the GIL); everything else (LLM-bound free
+    text plus the cheap MCQ/numeric scorers) runs in a thread pool.
+    """
+    if len(items) <= 1:
+        return [_grade_one(it) for it in items]
+
+    code_idx = [i for i, it in enumerate(items) if _route_item(it) == "code"]
+    code_set = set(code_idx)
+    other_idx = [i for i in range(len(items)) if i not in code_set]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as threads:
+        other_futs = {threads.submit(_grade_one, items[i]): i for i in other_idx}
+
+        if len(code_idx) > 1:
+            try:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as procs:
+                    for i, res in zip(code_idx, procs.map(_grade_one, [items[i] for i in code_idx])):
+                        results[i] = res
+            except concurrent.futures.process.BrokenProcessPool:
+                # e.g. no fork support / unpicklable payloads: fall back to in-process grading
+                for i in code_idx:
+                    results[i] = _grade_one(items[i])
         else:
-            res = {
-                "question_id": it["question_id"],
-                "type": kind,
-                "rubric_scores": [],
-                "total_score": 0,
-                "feedback": "Unknown type."
-            }
-        res["question_id"] = it["question_id"]
-        res["_student_raw_folder"] = it["student"]["raw_folder"]
-        results.append(res)
+            for i in code_idx:
+                results[i] = _grade_one(items[i])
+
+        for fut in concurrent.futures.as_completed(other_futs):
+            results[other_futs[fut]] = fut.result()
+
     return results
 
 
@@ -5,6 +5,11 @@ import argparse
 from .zip_parser import parse_ilias_zip, save_manifest, load_manifest, extract_student_files
 from .manifest_adapter import build_items_from_ingest
 
+try:
+    import orjson  # optional C-accelerated JSON
+except Exception:
+    orjson = None  # type: ignore
+
 
 def main():
     ap = argparse.ArgumentParser(description="ILIAS ZIP utilities (standalone; safe).")
@@ -44,11 +49,19 @@ def main():
 
     elif args.cmd == "items":
         ingest = load_manifest(args.manifest)
-        with open(args.questions, "r", encoding="utf-8") as f:
-            qman = json.load(f)
+        if orjson is not None:
+            with open(args.questions, "rb") as f:
+                qman = orjson.loads(f.read())
+        else:
+            with open(args.questions, "r", encoding="utf-8") as f:
+                qman = json.load(f)
         items = build_items_from_ingest(ingest, qman)
-        with open(args.out, "w", encoding="utf-8") as f:
-            json.dump(items, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            with open(args.out, "wb") as f:
+                f.write(orjson.dumps(items, option=orjson.OPT_INDENT_2))
+        else:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(items, f, ensure_ascii=False, indent=2)
         print(f"Wrote {len(items)} items → {args.out}")
 
 
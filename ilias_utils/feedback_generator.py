@@ -2,11 +2,16 @@
 import zipfile
 import io
 from dataclasses import dataclass, field
-from typing import List, Tuple
+from typing import List, Tuple, BinaryIO, Optional
 
 # Assuming the StudentFolder class is defined in zip_parser, we import it.
 # This creates a dependency, which is reasonable for this structure.
 from .zip_parser import StudentFolder
+from .zip_writer import deflate_many, file_info, write_predeflated
+
+# Payloads that are already compressed; deflating them again costs CPU for ~0% gain.
+_STORED_SUFFIXES = (".pdf", ".png", ".jpg", ".jpeg", ".zip", ".docx")
+_WRITE_CHUNK = 1024 * 1024
 
 @dataclass
 class FeedbackFile:
@@ -26,44 +31,67 @@ class FeedbackZipGenerator:
     """Generates a zip file for ILIAS feedback."""
 
     @staticmethod
-    def create_zip(feedback_items: List[Feedback], assignment_name: str) -> io.BytesIO:
+    def create_zip(feedback_items: List[Feedback], assignment_name: str, out: Optional[BinaryIO] = None) -> BinaryIO:
         """
-        Creates a zip file in memory containing feedback for multiple students.
+        Creates a zip file containing feedback for multiple students.
 
         Args:
             feedback_items: A list of Feedback objects.
             assignment_name: The name of the assignment, used as the root folder.
+            out: Optional writable binary stream to write the archive into
+                 (e.g. an open file). Defaults to a new in-memory buffer.
 
         Returns:
-            An io.BytesIO object containing the generated zip file data.
+            The stream the zip was written to. When `out` is omitted this is an
+            io.BytesIO positioned at the start.
         """
-        zip_buffer = io.BytesIO()
+        zip_buffer = out if out is not None else io.BytesIO()
+
+        # Collect members first so every DEFLATED payload can be compressed in
+        # parallel; the archive itself is still written sequentially in order.
+        members: List[Tuple[str, bytes]] = []
+        for item in feedback_items:
+            # The path inside the zip for this student's feedback
+            # Format: assignment_name/Lastname_Firstname_email_matric/
+            student_folder_path = f"{assignment_name}/{item.student.raw_folder}/"
+
+            # 1. Create the feedback text file
+            # ILIAS expects a simple text file with the score and comments.
+            feedback_content = (
+                f"Gesamtpunktzahl: {item.score}\n\n" # Using German "Gesamtpunktzahl" as is common in ILIAS
+                f"Kommentar:\n{item.feedback_comment}"
+            ).encode('utf-8')
+            members.append((f"{student_folder_path}feedback.txt", feedback_content))
+
+            # 2. Add any additional feedback files (e.g., annotated PDFs)
+            for fb_file in item.feedback_files:
+                members.append((f"{student_folder_path}{fb_file.filename}", fb_file.content))
+
+        to_deflate = [content for name, content in members if not name.lower().endswith(_STORED_SUFFIXES)]
+        deflated = deflate_many(to_deflate)
 
         with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
-            for item in feedback_items:
-                # The path inside the zip for this student's feedback
-                # Format: assignment_name/Lastname_Firstname_email_matric/
-                student_folder_path = f"{assignment_name}/{item.student.raw_folder}/"
-
-                # 1. Create the feedback text file
-                # ILIAS expects a simple text file with the score and comments.
-                feedback_content = (
-                    f"Gesamtpunktzahl: {item.score}\n\n" # Using German "Gesamtpunktzahl" as is common in ILIAS
-                    f"Kommentar:\n{item.feedback_comment}"
-                ).encode('utf-8')
-                
-                feedback_filename = f"{student_folder_path}feedback.txt"
-                zf.writestr(feedback_filename, feedback_content)
-
-                # 2. Add any additional feedback files (e.g., annotated PDFs)
-                for fb_file in item.feedback_files:
-                    file_path = f"{student_folder_path}{fb_file.filename}"
-                    zf.writestr(file_path, fb_file.content)
+            for arcname, content in members:
+                zinfo = file_info(arcname)
+                if arcname.lower().endswith(_STORED_SUFFIXES):
+                    FeedbackZipGenerator._write_member(zf, zinfo, content)
+                else:
+                    write_predeflated(zf, zinfo, *next(deflated))
 
         # Reset buffer position to the beginning before returning
-        zip_buffer.seek(0)
+        if out is None:
+            zip_buffer.seek(0)
         return zip_buffer
 
+    @staticmethod
+    def _write_member(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, content: bytes) -> None:
+        """Stores an already-compressed format as-is, streaming it in chunks."""
+        zinfo.compress_type = zipfile.ZIP_STORED
+        view = memoryview(content)
+        with zf.open(zinfo, "w") as fh:
+            for start in range(0, len(view), _WRITE_CHUNK):
+                fh.write(view[start:start + _WRITE_CHUNK])
+
     @staticmethod
     def extract_file_from_zip(zip_file: io.BytesIO, file_arcname: str) -> bytes | None:
         """
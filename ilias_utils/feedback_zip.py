@@ -1,9 +1,23 @@
 # ilias_utils/feedback_zip.py
 import os
+import io
 import json
+import shutil
+import struct
+import tempfile
+import time
 import zipfile
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import functools
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Any, Iterator, List, Optional, Tuple
+
+from .zip_writer import deflate_raw, file_info, write_dir, write_predeflated
+
+try:
+    import orjson  # optional C-accelerated JSON, emits bytes directly
+except Exception:
+    orjson = None  # type: ignore
 
 """
 Build a feedback ZIP compatible with ILIAS "multi_feedback" uploads.
@@ -19,10 +33,54 @@ Layout produced:
 ROOT name is copied from a reference feedback zip if provided; else synthesized.
 """
 
+_NO_FEEDBACK_TXT = b"No feedback generated for this submission.\n"
+_MISSING = object()  # sentinel: student has no graded result
+_COPY_CHUNK = 16 * 1024 * 1024
+
+
+def _dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass  # e.g. non-str dict keys; let stdlib handle it
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _first_root_dir_entry(fp) -> Optional[str]:
+    """
+    Walk central-directory records straight from the end-of-central-directory
+    record, stopping at the first top-level directory entry. Unlike
+    ZipFile(), no ZipInfo is built for the (usually many) entries after it.
+    """
+    endrec = zipfile._EndRecData(fp)
+    if not endrec:
+        raise zipfile.BadZipFile("File is not a zip file")
+    start_dir = endrec[zipfile._ECD_LOCATION] - endrec[zipfile._ECD_SIZE]
+    if endrec[zipfile._ECD_SIGNATURE] == zipfile.stringEndArchive64:
+        start_dir -= zipfile.sizeEndCentDir64 + zipfile.sizeEndCentDir64Locator
+    fp.seek(start_dir)
+    for _ in range(endrec[zipfile._ECD_ENTRIES_TOTAL]):
+        centdir = struct.unpack(zipfile.structCentralDir, fp.read(zipfile.sizeCentralDir))
+        if centdir[zipfile._CD_SIGNATURE] != zipfile.stringCentralDir:
+            raise zipfile.BadZipFile("Bad magic number for central directory")
+        raw = fp.read(centdir[zipfile._CD_FILENAME_LENGTH])
+        arc = raw.decode("utf-8" if centdir[zipfile._CD_FLAG_BITS] & 0x800 else "cp437").replace("\\", "/")
+        if arc.endswith("/") and arc.count("/") == 1:
+            return arc  # keep trailing slash
+        fp.seek(centdir[zipfile._CD_EXTRA_FIELD_LENGTH] + centdir[zipfile._CD_COMMENT_LENGTH], os.SEEK_CUR)
+    return None
+
 
 def _read_root_from_reference(reference_feedback_zip: str) -> Optional[str]:
     if not reference_feedback_zip or not os.path.isfile(reference_feedback_zip):
         return None
+    try:
+        with open(reference_feedback_zip, "rb") as fp:
+            return _first_root_dir_entry(fp)
+    except Exception:
+        pass
+    # Unusual archive layout: let zipfile parse it the slow way.
     try:
         with zipfile.ZipFile(reference_feedback_zip, "r") as z:
             for info in z.infolist():
@@ -35,30 +93,70 @@ def _read_root_from_reference(reference_feedback_zip: str) -> Optional[str]:
 
 
 def _synth_root(assignment_name: str) -> str:
-    ts = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    return _synth_root_at(assignment_name, int(time.time()))
+
+
+@functools.lru_cache(maxsize=32)
+def _synth_root_at(assignment_name: str, epoch_s: int) -> str:
+    # UTC timestamp with second resolution; time.gmtime avoids building a datetime
+    # (and datetime.utcnow() is deprecated since 3.12).
+    ts = time.strftime("%Y%m%dT%H%M%S", time.gmtime(epoch_s))
     return f"multi_feedback_{assignment_name}_{ts}/"
 
 
-def _render_feedback_txt(student_result: Dict[str, Any]) -> str:
-    lines = []
-    lines.append(f"Overall Score: {student_result.get('overall_score', '—')}")
-    if student_result.get("instructor_note"):
-        lines.append(f"Instructor Note: {student_result['instructor_note']}")
-    lines.append("")
-    lines.append("Per-question feedback:")
-    for it in student_result.get("items", []):
-        qid = it.get("question_id", "Q?")
-        tscore = it.get("total_score", "—")
-        lines.append(f"- {qid}: {tscore}")
-        rb = it.get("rubric_scores", [])
+def _render_feedback_txt(student_result: Dict[str, Any]) -> bytes:
+    """Render feedback.txt as UTF-8 bytes (constant fragments are pre-encoded)."""
+    buf = io.BytesIO()
+    w = buf.write
+    get = student_result.get
+    w(f"Overall Score: {get('overall_score', '—')}\n".encode())
+    note = get("instructor_note")
+    if note:
+        w(f"Instructor Note: {note}\n".encode())
+    w(b"\nPer-question feedback:\n")
+    for it in get("items", []):
+        iget = it.get
+        w(f"- {iget('question_id', 'Q?')}: {iget('total_score', '—')}\n".encode())
+        rb = iget("rubric_scores", [])
         if rb:
-            parts = [f"{r['criteria']}: {r['score']}/{r['max_score']}" for r in rb]
-            lines.append(f"  Rubric: " + "; ".join(parts))
-        if it.get("feedback_text"):
-            lines.append(f"  Feedback: {it['feedback_text']}")
-        if it.get("explanation"):
-            lines.append(f"  Explanation: {it['explanation']}")
-    return "\n".join(lines) + "\n"
+            w(b"  Rubric: ")
+            w("; ".join([f"{r['criteria']}: {r['score']}/{r['max_score']}" for r in rb]).encode())
+            w(b"\n")
+        fb = iget("feedback_text")
+        if fb:
+            w(f"  Feedback: {fb}\n".encode())
+        expl = iget("explanation")
+        if expl:
+            w(f"  Explanation: {expl}\n".encode())
+    return buf.getvalue()
+
+
+def _bounded_map(pool: ThreadPoolExecutor, fn, items: List[Any], window: int) -> Iterator[Any]:
+    """Like pool.map(), but keeps at most `window` results in flight so finished
+    payloads are written out and released instead of piling up in memory."""
+    pending: Deque[Future] = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def _encode_student(
+    sraw: str, result: Any, compresslevel: int
+) -> Tuple[Tuple[bytes, int, int], Tuple[bytes, int, int]]:
+    """Serialize and raw-deflate one student's feedback.json / feedback.txt."""
+    # feedback.json is machine-consumed; compact output keeps it small and cheap to deflate.
+    if result is _MISSING:
+        placeholder = {
+            "message": "No feedback generated for this submission.",
+            "raw_folder": sraw,
+        }
+        fb_json, fb_txt = _dumps(placeholder), _NO_FEEDBACK_TXT
+    else:
+        fb_json, fb_txt = _dumps(result), _render_feedback_txt(result)
+    return deflate_raw(fb_json, compresslevel), deflate_raw(fb_txt, compresslevel)
 
 
 def build_feedback_zip(
@@ -66,6 +164,9 @@ def build_feedback_zip(
     graded_results: List[Dict[str, Any]],
     out_zip_path: str,
     reference_feedback_zip: Optional[str] = None,
+    compresslevel: int = 3,
+    emit_dir_entries: bool = True,
+    max_mem_mb: int = 256,
 ) -> str:
     """
     Creates a feedback ZIP with:
@@ -75,32 +176,45 @@ def build_feedback_zip(
           feedback.txt
 
     <raw_folder> values are reused EXACTLY from ingest_manifest['student_folders'][*]['raw_folder'].
+
+    compresslevel defaults to 3: the small, repetitive feedback files compress
+    to nearly the same size as at zlib's default 6 for much less CPU.
+
+    emit_dir_entries=False skips the explicit <ROOT>/ and <raw_folder>/ entries
+    (files are addressed by full path, so most unzippers don't need them).
+
+    The archive is assembled in memory and written to out_zip_path in a few
+    large writes instead of thousands of small header/data writes; past
+    max_mem_mb it spills to a temporary file.
     """
     results_by_raw = {r["raw_folder"]: r for r in graded_results}
+    folders = [sf["raw_folder"] for sf in ingest_manifest.get("student_folders", [])]
 
     root = _read_root_from_reference(reference_feedback_zip) or _synth_root(ingest_manifest["assignment_name"])
     if not root.endswith("/"):
         root += "/"
 
-    with zipfile.ZipFile(out_zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
-        z.writestr(root, b"")
-
-        for sf in ingest_manifest.get("student_folders", []):
-            sraw = sf["raw_folder"]
-            student_dir = f"{root}{sraw}/"
-            z.writestr(student_dir, b"")
-
-            result = results_by_raw.get(sraw)
-            if not result:
-                placeholder = {
-                    "message": "No feedback generated for this submission.",
-                    "raw_folder": sraw,
-                }
-                z.writestr(student_dir + "feedback.json", json.dumps(placeholder, ensure_ascii=False, indent=2))
-                z.writestr(student_dir + "feedback.txt", "No feedback generated for this submission.\n")
-                continue
-
-            z.writestr(student_dir + "feedback.json", json.dumps(result, ensure_ascii=False, indent=2))
-            z.writestr(student_dir + "feedback.txt", _render_feedback_txt(result))
+    def encode(sraw: str):
+        return _encode_student(sraw, results_by_raw.get(sraw, _MISSING), compresslevel)
+
+    # Encoding + deflating run in worker threads (zlib releases the GIL);
+    # entries are still appended to the archive serially, in manifest order.
+    workers = min(32, (os.cpu_count() or 1) + 4)
+    spool = tempfile.SpooledTemporaryFile(max_size=max_mem_mb << 20)
+    with spool, ThreadPoolExecutor(workers) as pool:
+        with zipfile.ZipFile(spool, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as z:
+            if emit_dir_entries:
+                write_dir(z, root)
+
+            for sraw, (fb_json, fb_txt) in zip(folders, _bounded_map(pool, encode, folders, 2 * workers)):
+                student_dir = f"{root}{sraw}/"
+                if emit_dir_entries:
+                    write_dir(z, student_dir)
+                write_predeflated(z, file_info(student_dir + "feedback.json"), *fb_json)
+                write_predeflated(z, file_info(student_dir + "feedback.txt"), *fb_txt)
+
+        spool.seek(0)
+        with open(out_zip_path, "wb") as f:
+            shutil.copyfileobj(spool, f, _COPY_CHUNK)
 
     return out_zip_path
@@ -1,7 +1,43 @@
 # ilias_utils/manifest_adapter.py
-from typing import Dict, Any, List
+import os
+import re
+from fnmatch import translate
+from typing import Callable, Dict, Any, List, Optional
 from .models import IngestResult
 
+# fnmatch() matches through os.path.normcase, i.e. case-insensitively on Windows.
+_GLOB_FLAGS = re.IGNORECASE if os.path.normcase("A") != "A" else 0
+_GLOB_META = re.compile(r"[*?\[]")
+
+
+def _compile_globs(file_globs: List[str]) -> Optional[Callable[[str], bool]]:
+    """
+    Build one matcher for a question's globs (None when there are no globs).
+
+    The common "*<literal>" globs ("*.py", "*_test.py") are just suffix checks,
+    done with a single str.endswith(tuple); anything else is folded into one
+    alternation regex.
+    """
+    if not file_globs:
+        return None
+    suffixes: List[str] = []
+    others: List[str] = []
+    for pat in file_globs:
+        if pat.startswith("*") and not _GLOB_META.search(pat, 1):
+            suffixes.append(pat[1:].lower() if _GLOB_FLAGS else pat[1:])
+        else:
+            others.append(pat)
+    suffix_tuple = tuple(suffixes)
+    regex_match = re.compile("|".join(translate(p) for p in others), _GLOB_FLAGS).match if others else None
+
+    def match(filename: str) -> bool:
+        if suffix_tuple and (filename.lower() if _GLOB_FLAGS else filename).endswith(suffix_tuple):
+            return True
+        return regex_match is not None and regex_match(filename) is not None
+
+    return match
+
+
 def build_items_from_ingest(
     ingest: IngestResult | Dict[str, Any],
     question_manifest: Dict[str, Any],
@@ -24,22 +60,18 @@ def build_items_from_ingest(
       ]
     }
     """
-    from fnmatch import fnmatch
-
     ingest_dict: Dict[str, Any] = ingest if isinstance(ingest, dict) else ingest.to_dict()
     items: List[Dict[str, Any]] = []
     questions = question_manifest.get("questions", [])
+    # Compile each question's globs once instead of per student x file.
+    q_matchers = [(q, _compile_globs(q.get("file_globs", []))) for q in questions]
 
     for sf in ingest_dict.get("student_folders", []):
-        for q in questions:
-            file_globs = q.get("file_globs", [])
+        for q, match in q_matchers:
             matching_arcnames: List[str] = []
 
-            for f in sf.get("files", []):
-                if not file_globs:
-                    continue
-                if any(fnmatch(f["filename"], pat) for pat in file_globs):
-                    matching_arcnames.append(f["arcname"])
+            if match is not None:
+                matching_arcnames = [f["arcname"] for f in sf.get("files", []) if match(f["filename"])]
 
             item: Dict[str, Any] = {
                 "student": {
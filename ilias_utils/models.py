@@ -1,10 +1,10 @@
 
 # ilias_utils/models.py
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, fields
 from typing import List, Optional, Dict, Any
 
 
-@dataclass
+@dataclass(slots=True)
 class StudentFile:
     arcname: str                 # path inside zip: submissions/<folder>/<file>
     filename: str                # basename.ext
@@ -12,8 +12,17 @@ class StudentFile:
     content_type: Optional[str] = None  # guessed content type
     multimodal_content: List[Dict[str, Any]] = field(default_factory=list)
 
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "arcname": self.arcname,
+            "filename": self.filename,
+            "size": self.size,
+            "content_type": self.content_type,
+            "multimodal_content": self.multimodal_content,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class StudentFolder:
     raw_folder: str              # "Lastname Firstname email@domain 123456" (or underscore variant)
     lastname: Optional[str]
@@ -24,33 +33,58 @@ class StudentFolder:
     answers: Dict[str, str] = field(default_factory=dict) # NEW: To store parsed answers
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        # Built by hand instead of dataclasses.asdict(), which deep-copies every
+        # nested value. Nested content is shared, so treat the result as read-only.
+        return {
+            "raw_folder": self.raw_folder,
+            "lastname": self.lastname,
+            "firstname": self.firstname,
+            "email": self.email,
+            "matric": self.matric,
+            "files": [f.to_dict() for f in self.files],
+            "answers": self.answers,
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class IngestResult:
     assignment_name: str
     student_folders: List[StudentFolder]
     excel_path: Optional[str] = None
 
     def to_dict(self) -> Dict[str, Any]:
-        return asdict(self)
+        return {
+            "assignment_name": self.assignment_name,
+            "student_folders": [sf.to_dict() for sf in self.student_folders],
+            "excel_path": self.excel_path,
+        }
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'IngestResult':
-        # De-serialize nested StudentFolder objects correctly
+        # De-serialize nested StudentFolder/StudentFile objects with positional
+        # args and pre-bound constructors (no **kwargs matching per object).
+        # Required keys are indexed and unknown keys rejected, so a malformed
+        # manifest fails like the keyword constructors would. The input dict is
+        # left untouched.
+        SFile, SFolder = StudentFile, StudentFolder
+        _check_keys(cls, data)
         student_folders = []
-        for sf_data in data.get("student_folders", []):
-            # Extract files and answers if they exist
-            files_data = sf_data.pop("files", [])
-            answers_data = sf_data.pop("answers", {})
-            
-            # Create StudentFile objects
-            student_files = [StudentFile(**f_data) for f_data in files_data]
-            
-            # Create StudentFolder object
-            sf = StudentFolder(**sf_data, files=student_files, answers=answers_data)
-            student_folders.append(sf)
-
-        data["student_folders"] = student_folders
-        return cls(**data)
+        for sf in data.get("student_folders", []):
+            _check_keys(SFolder, sf)
+            files = []
+            for f in sf.get("files", []):
+                _check_keys(SFile, f)
+                files.append(SFile(f["arcname"], f["filename"], f["size"], f.get("content_type"), f.get("multimodal_content", [])))
+            student_folders.append(SFolder(
+                sf["raw_folder"], sf["lastname"], sf["firstname"], sf["email"], sf["matric"],
+                files, sf.get("answers", {}),
+            ))
+        return cls(data["assignment_name"], student_folders, data.get("excel_path"))
+
+
+_FIELD_NAMES = {c: frozenset(f.name for f in fields(c)) for c in (StudentFile, StudentFolder, IngestResult)}
+
+def _check_keys(cls: type, data: Dict[str, Any]) -> None:
+    unknown = data.keys() - _FIELD_NAMES[cls]
+    if unknown:
+        raise TypeError(f"{cls.__name__}.__init__() got an unexpected keyword argument {min(unknown)!r}")
@@ -1,6 +1,10 @@
 
 # ilias_utils/pdf_feedback.py
 import io
+import struct
+import functools
+import tempfile
+from typing import BinaryIO, Optional, Tuple
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
@@ -8,10 +12,62 @@ from reportlab.lib.units import inch
 from reportlab.lib import colors
 from PIL import Image as PILImage
 
+from .zip_writer import deflate_raw
+
+# Reports stay in memory up to this size, then spill to a temp file.
+_PDF_SPOOL_MAX = 1024 * 1024
+_PNG_SIG = b"\x89PNG\r\n\x1a\n"
+# JPEG start-of-frame markers (C4/C8/CC are DHT/JPG/DAC, not frames)
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def _image_size(data: bytes) -> Optional[Tuple[int, int]]:
+    """Read (width, height) from a PNG/JPEG header without decoding; None if unknown."""
+    if data[:8] == _PNG_SIG and data[12:16] == b"IHDR":
+        return struct.unpack(">II", data[16:24])
+    if data[:2] == b"\xff\xd8":
+        i, n = 2, len(data)
+        while i + 9 <= n:
+            if data[i] != 0xFF:
+                return None
+            marker = data[i + 1]
+            if marker == 0xFF:  # fill byte
+                i += 1
+                continue
+            if marker in _JPEG_SOF:
+                h, w = struct.unpack(">HH", data[i + 5:i + 9])
+                return w, h
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # standalone markers
+                i += 2
+                continue
+            i += 2 + struct.unpack(">H", data[i + 2:i + 4])[0]
+    return None
+
 class FeedbackPDFGenerator:
     """Generates a detailed PDF feedback report for a single student."""
 
+    # Shared across all reports; neither the stylesheet nor these are mutated per PDF.
+    _SUMMARY_TABLE_STYLE = TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.darkblue),
+        ('TEXTCOLOR',(0,0),(-1,0),colors.whitesmoke),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0,0), (-1,0), 12),
+        ('BACKGROUND', (0,1), (-1,-2), colors.lightblue),
+        ('GRID', (0,0), (-1,-1), 1, colors.black),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.darkblue),
+        ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
+    ])
+    _RUBRIC_TABLE_STYLE = TableStyle([
+        ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
+        ('GRID', (0,0), (-1,-1), 1, colors.black),
+        ('ALIGN', (0,0), (-1,-1), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+    ])
+
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def _get_styles():
         styles = getSampleStyleSheet()
         styles.add(ParagraphStyle(name='h1_center', parent=styles['h1'], alignment=TA_CENTER))
@@ -52,16 +108,24 @@ class FeedbackPDFGenerator:
             elif content_type == 'image' and content:
                 try:
                     img_data = io.BytesIO(content)
-                    pil_img = PILImage.open(img_data)
-                    
+                    # Dimensions attached by the producer, else a PNG/JPEG
+                    # header parse; PIL only for anything else.
+                    width, height = block.get('width'), block.get('height')
+                    size = (width, height) if width and height else _image_size(content)
+                    if size is None:
+                        with PILImage.open(img_data) as pil_img:
+                            size = pil_img.size
+                        img_data.seek(0)
+                    width, height = size
+
                     max_width = 5 * inch
-                    if pil_img.width > max_width:
-                        aspect_ratio = pil_img.height / pil_img.width
+                    if width > max_width:
+                        aspect_ratio = height / width
                         new_width = max_width
                         new_height = new_width * aspect_ratio
                         img = Image(img_data, width=new_width, height=new_height)
                     else:
-                        img = Image(img_data, width=pil_img.width, height=pil_img.height)
+                        img = Image(img_data, width=width, height=height)
 
                     story.append(img)
                     story.append(Spacer(1, 0.1 * inch))
@@ -69,8 +133,13 @@ class FeedbackPDFGenerator:
                     story.append(Paragraph("<i>[Could not display image]</i>", styles['BodyText']))
 
     @staticmethod
-    def create_pdf(student_id: str, assignment_name: str, grading_data: list, total_score: float, total_possible: float) -> io.BytesIO:
-        buffer = io.BytesIO()
+    def create_pdf(student_id: str, assignment_name: str, grading_data: list, total_score: float, total_possible: float) -> BinaryIO:
+        """
+        Builds the report and returns a binary file object positioned at the start.
+        It is a SpooledTemporaryFile: read it with .read() (not .getvalue()) and
+        close it when done.
+        """
+        buffer = tempfile.SpooledTemporaryFile(max_size=_PDF_SPOOL_MAX, mode="w+b")
         doc = SimpleDocTemplate(buffer, rightMargin=inch/2, leftMargin=inch/2, topMargin=inch/2, bottomMargin=inch/2)
         styles = FeedbackPDFGenerator._get_styles()
         story = []
@@ -84,27 +153,21 @@ class FeedbackPDFGenerator:
 
         # 2. Summary Table
         story.append(Paragraph("Overall Score Summary", styles['h3']))
+        # Per-question (score, possible), shared by the summary and detail tables.
+        q_totals = [
+            (sum(r.get("score", 0) for r in q_data.get("rubric_scores", [])),
+             sum(r.get("points", 0) for r in q_data.get("rubric_list", [])))
+            for q_data in grading_data
+        ]
         summary_data = [['Question', 'Score']]
         for i, q_data in enumerate(grading_data):
-            q_score = sum(r.get("score", 0) for r in q_data.get("rubric_scores", []))
-            q_possible = sum(r.get("points", 0) for r in q_data.get("rubric_list", []))
+            q_score, q_possible = q_totals[i]
             summary_data.append([Paragraph(f"Q{i+1}: {q_data['question'][:80]}...", styles['BodyText']), f"{q_score} / {q_possible}"])
         
         summary_data.append(['<b>TOTAL SCORE</b>', f"<b>{total_score} / {total_possible}</b>"])
 
         summary_table = Table(summary_data, colWidths=[4.5*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.darkblue),
-            ('TEXTCOLOR',(0,0),(-1,0),colors.whitesmoke),
-            ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-            ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0,0), (-1,0), 12),
-            ('BACKGROUND', (0,1), (-1,-2), colors.lightblue),
-            ('GRID', (0,0), (-1,-1), 1, colors.black),
-            ('BACKGROUND', (0, -1), (-1, -1), colors.darkblue),
-            ('TEXTCOLOR', (0, -1), (-1, -1), colors.whitesmoke),
-        ]))
+        summary_table.setStyle(FeedbackPDFGenerator._SUMMARY_TABLE_STYLE)
         story.append(summary_table)
         story.append(PageBreak())
 
@@ -125,17 +188,11 @@ class FeedbackPDFGenerator:
             for score_item, rubric_item in zip(rubric_scores[:min_len], rubric_list[:min_len]):
                 rubric_data.append([Paragraph(rubric_item['criteria'], styles['BodyText']), score_item['score'], rubric_item['points']])
             
-            q_score = sum(r.get("score", 0) for r in rubric_scores)
-            q_possible = sum(r.get("points", 0) for r in rubric_list)
+            q_score, q_possible = q_totals[i]
             rubric_data.append(['<b>Total for Question</b>', f'<b>{q_score}</b>', f'<b>{q_possible}</b>'])
 
             rubric_table = Table(rubric_data, colWidths=[4*inch, 1.25*inch, 1.25*inch])
-            rubric_table.setStyle(TableStyle([
-                ('BACKGROUND', (0,0), (-1,0), colors.lightgrey),
-                ('GRID', (0,0), (-1,-1), 1, colors.black),
-                ('ALIGN', (0,0), (-1,-1), 'CENTER'),
-                ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-            ]))
+            rubric_table.setStyle(FeedbackPDFGenerator._RUBRIC_TABLE_STYLE)
             story.append(rubric_table)
             story.append(Spacer(1, 0.2 * inch))
             
@@ -160,3 +217,23 @@ class FeedbackPDFGenerator:
         doc.build(story)
         buffer.seek(0)
         return buffer
+
+
+def create_pdf_bytes(student_id: str, assignment_name: str, grading_data: list,
+                     total_score: float, total_possible: float) -> bytes:
+    """
+    FeedbackPDFGenerator.create_pdf() returning the finished report as bytes.
+    A plain module-level function, so process pools can pickle it by reference.
+    """
+    with FeedbackPDFGenerator.create_pdf(student_id, assignment_name, grading_data,
+                                         total_score, total_possible) as buffer:
+        return buffer.read()
+
+
+def create_pdf_deflated(student_id: str, assignment_name: str, grading_data: list,
+                        total_score: float, total_possible: float) -> Tuple[bytes, int, int]:
+    """
+    create_pdf_bytes() already raw-deflated for a ZIP member: (deflated, crc32, size),
+    ready for zip_writer.write_predeflated(). Lets pool workers do the compression too.
+    """
+    return deflate_raw(create_pdf_bytes(student_id, assignment_name, grading_data, total_score, total_possible))
@@ -0,0 +1,121 @@
+# ilias_utils/zip_writer.py
+"""
+Helpers for writing ZIP members whose payload was deflated ahead of time.
+
+zipfile compresses each member inline while holding the archive open, so
+large batches are deflated one file at a time. Compressing the payloads
+first (in a worker pool) and then appending the finished bytes keeps the
+archive writes sequential while the CPU-heavy part runs in parallel.
+"""
+
+import time
+import zlib
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional, Tuple
+
+try:
+    import deflate as _libdeflate  # libdeflate binding (PyPI: "deflate"); ~2x zlib speed
+except Exception:
+    _libdeflate = None
+
+DEFAULT_LEVEL = 6
+_DIR_ATTR = (0o40775 << 16) | 0x10  # drwxrwxr-x + MS-DOS directory flag, as writestr() sets
+
+
+def deflate_raw(data: bytes, level: int = DEFAULT_LEVEL) -> Tuple[bytes, int, int]:
+    """Raw-deflate `data` (no zlib header, as stored in ZIP). Returns (deflated, crc32, size)."""
+    if _libdeflate is not None:
+        return _libdeflate.deflate_compress(data, level), _libdeflate.crc32(data), len(data)
+    co = zlib.compressobj(level, zlib.DEFLATED, -15)
+    deflated = co.compress(data) + co.flush()
+    return deflated, zlib.crc32(data), len(data)
+
+
+def file_info(arcname: str) -> zipfile.ZipInfo:
+    """ZipInfo with the same timestamp/permissions ZipFile.writestr() gives a plain name."""
+    zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(time.time())[:6])
+    zinfo.external_attr = 0o600 << 16
+    return zinfo
+
+
+def write_deflated(zf: zipfile.ZipFile, arcname: str, data: bytes, level: int = DEFAULT_LEVEL) -> None:
+    """Compress `data` with deflate_raw() and append it as `arcname`."""
+    write_predeflated(zf, file_info(arcname), *deflate_raw(data, level))
+
+
+def deflate_many(
+    payloads: Iterable[bytes],
+    level: int = DEFAULT_LEVEL,
+    max_workers: Optional[int] = None,
+) -> Iterator[Tuple[bytes, int, int]]:
+    """
+    Deflate payloads concurrently, yielding results in input order.
+
+    zlib releases the GIL while compressing, so threads scale across cores
+    without pickling every payload into a worker process.
+    """
+    payloads = list(payloads)
+    if len(payloads) <= 1:
+        for data in payloads:
+            yield deflate_raw(data, level)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        yield from pool.map(lambda d: deflate_raw(d, level), payloads)
+
+
+def write_predeflated(
+    zf: zipfile.ZipFile,
+    zinfo: zipfile.ZipInfo,
+    deflated: bytes,
+    crc: int,
+    size: int,
+) -> None:
+    """
+    Append an already raw-deflated member to an archive opened for writing.
+
+    Sizes and CRC are known up front, so the local header is written once
+    with final values (no data descriptor) followed by the compressed bytes.
+    This mirrors the bookkeeping ZipFile.mkdir()/writestr() do internally.
+    """
+    if zf._writing:
+        raise ValueError("Can't write to ZIP archive while an open writing handle exists")
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.file_size = size
+    zinfo.compress_size = len(deflated)
+    zinfo.CRC = crc
+    zip64 = size > zipfile.ZIP64_LIMIT or len(deflated) > zipfile.ZIP64_LIMIT
+    if zip64 and not zf._allowZip64:
+        raise zipfile.LargeZipFile("Filesize would require ZIP64 extensions")
+    _append(zf, zinfo, deflated, zip64)
+
+
+def write_dir(zf: zipfile.ZipFile, arcname: str) -> None:
+    """
+    Append a directory entry, as ZipFile.writestr(arcname, b"") would for a
+    name ending in "/", but stored and without spinning up a compressor.
+    """
+    if zf._writing:
+        raise ValueError("Can't write to ZIP archive while an open writing handle exists")
+    if not arcname.endswith("/"):
+        arcname += "/"
+    zinfo = zipfile.ZipInfo(arcname, date_time=time.localtime(time.time())[:6])
+    zinfo.external_attr = _DIR_ATTR
+    zinfo.compress_type = zipfile.ZIP_STORED
+    zinfo.file_size = zinfo.compress_size = zinfo.CRC = 0
+    _append(zf, zinfo, b"", False)
+
+
+def _append(zf: zipfile.ZipFile, zinfo: zipfile.ZipInfo, payload: bytes, zip64: bool) -> None:
+    with zf._lock:
+        if zf._seekable:
+            zf.fp.seek(zf.start_dir)
+        zinfo.header_offset = zf.fp.tell()
+        zf._writecheck(zinfo)
+        zf._didModify = True
+
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+        zf.fp.write(zinfo.FileHeader(zip64))
+        zf.fp.write(payload)
+        zf.start_dir = zf.fp.tell()
@@ -1,38 +1,88 @@
+import os
 import streamlit as st
 import bcrypt
 import psycopg2
+from psycopg2.extensions import connection as _PgConnection
+from psycopg2.pool import ThreadedConnectionPool, PoolError
+
+# bcrypt's default of 12 rounds costs ~250 ms per hash and blocks the script
+# run; 10 is 4x cheaper. checkpw() reads the cost from the stored hash, so
+# existing 12-round hashes keep verifying.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "10"))
 
 # --- DATABASE CONNECTION ---
+# Upper bound on pooled auth connections per server process. The pool doesn't
+# block when it is exhausted; logins beyond it get a one-off connection.
+AUTH_POOL_MAX = int(os.getenv("AUTH_POOL_MAX", "8"))
+
+_CONN_KWARGS = dict(
+    host="localhost", database="autograder_db",
+    user="vedant", password="vedant",
+)
+
+class _AuthConnection(_PgConnection):
+    # Set once the login query has been PREPAREd on this session.
+    login_prepared = False
+    # False for overflow connections opened outside the pool.
+    pooled = True
+
+@st.cache_resource
+def _get_pool():
+    # One pool per server process; reruns reuse its open connections instead
+    # of paying the connect/auth handshake on every login.
+    return ThreadedConnectionPool(1, AUTH_POOL_MAX, connection_factory=_AuthConnection, **_CONN_KWARGS)
+
 def get_conn():
-    return psycopg2.connect(
-        host="localhost", database="autograder_db",
-        user="vedant", password="vedant"
-    )
+    try:
+        return _get_pool().getconn()
+    except PoolError:
+        conn = psycopg2.connect(connection_factory=_AuthConnection, **_CONN_KWARGS)
+        conn.pooled = False
+        return conn
+
+def put_conn(conn):
+    if not conn.pooled:
+        conn.close()
+        return
+    # Broken sessions are closed by the pool rather than handed out again.
+    _get_pool().putconn(conn, close=bool(conn.closed))
 
 # --- REGISTRATION FUNCTION ---
 def register_user(university_email, username, password):
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT 1 FROM professors WHERE university_email=%s OR username=%s", (university_email, username))
-    if cur.fetchone():
-        conn.close()
-        return False, "Username or University Email already registered."
-    hash_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt())
-    cur.execute(
-        "INSERT INTO professors (university_email, username, password_hash, subjects, sessions) VALUES (%s,%s,%s,%s,%s)",
-        (university_email, username, hash_pw.decode(), '', '')
-    )
-    conn.commit()
-    conn.close()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT 1 FROM professors WHERE university_email=%s OR username=%s", (university_email, username))
+        if cur.fetchone():
+            conn.rollback()
+            return False, "Username or University Email already registered."
+        hash_pw = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+        cur.execute(
+            "INSERT INTO professors (university_email, username, password_hash, subjects, sessions) VALUES (%s,%s,%s,%s,%s)",
+            (university_email, username, hash_pw.decode(), '', '')
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        put_conn(conn)
     return True, "🎉 Registration successful! Please login."
 
 # --- LOGIN FUNCTION ---
 def check_login(username, password):
     conn = get_conn()
-    cur = conn.cursor()
-    cur.execute("SELECT id, university_email, subjects, sessions, password_hash FROM professors WHERE username=%s", (username,))
-    row = cur.fetchone()
-    conn.close()
+    try:
+        cur = conn.cursor()
+        if not conn.login_prepared:
+            # Parsed and planned once per pooled connection, then reused by EXECUTE.
+            cur.execute("PREPARE login_q (text) AS SELECT id, university_email, subjects, sessions, password_hash FROM professors WHERE username=$1")
+            conn.login_prepared = True
+        cur.execute("EXECUTE login_q (%s)", (username,))
+        row = cur.fetchone()
+        conn.rollback()  # end the read transaction before the connection goes back to the pool
+    finally:
+        put_conn(conn)
     if row and bcrypt.checkpw(password.encode(), row[4].encode()):
         return {
             "id": row[0], "university_email": row[1],
@@ -1,10 +1,10 @@
 import streamlit as st
-from io import BytesIO
+from io import BytesIO, StringIO
 from reportlab.lib.pagesizes import letter  # kept in case other pages import/use
 from reportlab.pdfgen import canvas         # kept in case other pages import/use
 import re
 import json
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator
 import fitz  # PyMuPDF
 
 from grader_engine.pdf_parser_multimodal import extract_multimodal_content_from_pdf
@@ -12,6 +12,42 @@ from grader_engine.multimodal_rag import MultimodalVectorStore
 from ilias_utils.zip_parser import parse_ilias_zip, IngestResult
 from ilias_utils.feedback_generator import FeedbackZipGenerator
 
+# Compact, non-ASCII-preserving rubric serialization, configured once.
+_RUBRIC_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+# =============================== PATTERNS =====================================
+# Compiled once at import; parsers call the bound methods directly.
+_INVIS_RE = re.compile(r"[\u200B-\u200D\uFEFF]")
+_HEAD_NORMALIZE_RE = re.compile(r'(?mi)^(Q(?:uestion)?|Aufgabe)\s*(\d+)\s*\([^)]*\)\s*:?')
+_PROF_META_RES = {
+    "professor": re.compile(r"(Professor(?:in)?):\s*(.+)", re.IGNORECASE),
+    "course": re.compile(r"(Course|Kurs):\s*(.+)", re.IGNORECASE),
+    "session": re.compile(r"(Session|Sitzung):\s*(.+)", re.IGNORECASE),
+    "assignment_no": re.compile(r"(Assignment(?: No)?|Aufgabe(?:n)?(?: Nr)?):\s*([^\n]+)", re.IGNORECASE),
+}
+_SPLIT_QBLOCK_RE = re.compile(r'(?mi)^\s*(Q\s*\d+\s*:|Aufgabe\s*\d+\s*:)\s*')
+_HDR_NUM_RE = re.compile(r'(?i)(?:Q|Aufgabe)\s*(\d+)')
+# Section labels inside a question block, found in one pass; each payload runs
+# from the end of its label to the start of the next one.
+_SECTION_RE = re.compile(
+    r'(?im)^\s*(?P<kind>Question|Frage|Ideal\s*(?:Answer|Antwort)|Rubric|Bewertungskriterien)\s*:\s*'
+)
+_SECTION_KIND = {"q": "q", "f": "q", "i": "ideal", "r": "rubric", "b": "rubric"}
+_BULLET_PTS_RE = re.compile(r'\(\s*(\d+(?:\.\d+)?)\s*(?:points?|pts?|pt|Punkte?)\s*\)\s*$', re.IGNORECASE)
+# Rubric lines that start (after indentation) with "-"; other lines are never materialized.
+_RUBRIC_BULLET_LINE_RE = re.compile(r'(?m)^[^\S\n]*-[^\n]*')
+# Leading "- " and trailing "(N pts)" of a bullet, stripped in one scan.
+_STRIP_BULLET_RE = re.compile(r'^\s*-\s*|\s*\(\s*\d+(?:\.\d+)?\s*(?:points?|pts?|pt|Punkte?)\s*\)\s*$')
+# The patterns below are only ever tried at line starts (see _next_line_match), so
+# they carry no ^ and the engine never walks the bodies between headers.
+_STUDENT_HDR_RE = re.compile(r'(Student\s*\d+\s*:|Studierende[rn]?\s*\d+\s*:)\s*')
+_ANSWER_KEY_RE = re.compile(r'(A\d+|F\d+)\s*:\s*')
+# What ends an answer: the next answer key or student header (leading whitespace allowed).
+_ANSWER_END_RE = re.compile(r'\s*(?:(?:A\d+|F\d+)\s*:|(?:Student\s*\d+|Studierende[rn]?\s*\d+)\s*:)')
+# Markers like Q1 / A1 / Answer 1 / Aufgabe 1 at the start of a line.
+_ANSWER_MARKER_RE = re.compile(r"(?i)\s*(?:Q|A|Answer|Aufgabe)\s*(\d+)\s*[:.)]?")
+
 
 # =============================== AUTH CHECK ===================================
 if "logged_in_prof" not in st.session_state:
@@ -21,9 +57,9 @@ prof = st.session_state["logged_in_prof"]
 
 
 # =============================== PDF UTILS ====================================
-def extract_text_from_pdf(pdf_file: BytesIO) -> str:
+def iter_pdf_pages(pdf_file: BytesIO) -> Iterator[str]:
     """
-    Extract raw text from uploaded PDF (file-like object).
+    Yield the raw text of each page of an uploaded PDF (file-like object), in order.
     NOTE: Requires the real PyMuPDF package (pip install PyMuPDF).
     """
     try:
@@ -31,14 +67,34 @@ def extract_text_from_pdf(pdf_file: BytesIO) -> str:
     except Exception:
         pass
     with fitz.open(stream=pdf_file.read(), filetype="pdf") as doc:
-        return "\n".join(page.get_text("text") for page in doc)
+        for page in doc:
+            yield page.get_text("text")
+
+
+def extract_text_from_pdf(pdf_file: BytesIO) -> str:
+    """
+    Extract raw text from uploaded PDF (file-like object), pages joined by newlines.
+    Pages are written into one buffer as they are produced, so no list of page
+    strings is held alongside the result.
+    """
+    buf = StringIO()
+    for i, page_text in enumerate(iter_pdf_pages(pdf_file)):
+        if i:
+            buf.write("\n")
+        buf.write(page_text)
+    return buf.getvalue()
 
 
 # ====================== PROFESSOR PDF PARSING (ROBUST) ========================
 def _clean_invisibles(s: str) -> str:
-    # Replace NBSP with space; strip zero-width chars & BOM
-    s = s.replace("\u00A0", " ")
-    s = re.sub(r"[\u200B-\u200D\uFEFF]", "", s)
+    # Replace NBSP with space; strip zero-width chars & BOM.
+    # The `in` probes are plain C scans, so clean text skips the regex entirely.
+    if "\u00A0" in s:
+        s = s.replace("\u00A0", " ")
+    for ch in "\u200B\u200C\u200D\uFEFF":
+        if ch in s:
+            s = _INVIS_RE.sub("", s)
+            break
     return s
 
 
@@ -50,9 +106,8 @@ def normalize_professor_headings(text: str) -> str:
       'Aufgabe 3 (Teil):'-> 'Aufgabe 3:'
     Also makes the colon optional.
     """
-    text = re.sub(r'(?mi)^(Q(?:uestion)?)\s*(\d+)\s*\([^)]*\)\s*:?', r'\1 \2:', text)
-    text = re.sub(r'(?mi)^(Aufgabe)\s*(\d+)\s*\([^)]*\)\s*:?', r'\1 \2:', text)
-    return text
+    # One pass for both heading styles.
+    return _HEAD_NORMALIZE_RE.sub(r'\1 \2:', text)
 
 
 def parse_professor_pdf(text: str) -> Dict:
@@ -74,19 +129,13 @@ def parse_professor_pdf(text: str) -> Dict:
     text = normalize_professor_headings(text)
 
     prof_info: Dict[str, Any] = {}
-    patterns = {
-        "professor": r"(Professor(?:in)?):\s*(.+)",
-        "course": r"(Course|Kurs):\s*(.+)",
-        "session": r"(Session|Sitzung):\s*(.+)",
-        "assignment_no": r"(Assignment(?: No)?|Aufgabe(?:n)?(?: Nr)?):\s*([^\n]+)",
-    }
-    for key, pat in patterns.items():
-        m = re.search(pat, text, re.IGNORECASE)
+    for key, pat in _PROF_META_RES.items():
+        m = pat.search(text)
         if m:
             prof_info[key] = m.group(2).strip()
 
     # Split into question blocks; accept leading spaces and 'Q 1:' or 'Aufgabe 1:'
-    blocks = re.split(r'(?mi)^\s*(Q\s*\d+\s*:|Aufgabe\s*\d+\s*:)\s*', text)
+    blocks = _SPLIT_QBLOCK_RE.split(text)
 
     questions: List[Dict] = []
     for i in range(1, len(blocks), 2):
@@ -94,61 +143,55 @@ def parse_professor_pdf(text: str) -> Dict:
         block = blocks[i + 1] if i + 1 < len(blocks) else ""
 
         # Normalize header to "Q<n>"
-        hdr_num = re.search(r'(?i)(?:Q|Aufgabe)\s*(\d+)', raw_hdr)
+        hdr_num = _HDR_NUM_RE.search(raw_hdr)
         if not hdr_num:
             continue
         qid = f"Q{hdr_num.group(1)}"
 
-        # QUESTION: prefer explicit label; fallback = everything until Ideal/Rubric
-        q_match = re.search(
-            r'(?:^|\n)(?:Question|Frage)\s*:\s*(.*?)(?=\n(?:Ideal\s*(?:Answer|Antwort)\s*:)|\n(?:Rubric|Bewertungskriterien)\s*:|\Z)',
-            block, re.S | re.IGNORECASE
-        )
-        if q_match:
-            question_text = q_match.group(1).strip()
+        # Locate every section label once; the first label of each kind wins.
+        hits = list(_SECTION_RE.finditer(block))
+        sections: Dict[str, str] = {}
+        for h, nxt in zip(hits, hits[1:] + [None]):
+            kind = _SECTION_KIND[block[h.start("kind")].lower()]
+            if kind not in sections:
+                sections[kind] = block[h.end():nxt.start() if nxt else len(block)].strip()
+
+        # QUESTION: prefer explicit label; fallback = everything until the first section
+        if "q" in sections:
+            question_text = sections["q"]
         else:
-            tmp = re.split(
-                r'(?mi)\n(?:Ideal\s*(?:Answer|Antwort)\s*:|(?:Rubric|Bewertungskriterien)\s*:)',
-                block, maxsplit=1
-            )
-            question_text = tmp[0].strip() if tmp else block.strip()
+            question_text = (block[:hits[0].start()] if hits else block).strip()
 
         # IDEAL ANSWER (optional)
-        ia_match = re.search(
-            r'(?:^|\n)(?:Ideal\s*(?:Answer|Antwort))\s*:\s*(.*?)(?=\n\s*(?:Rubric|Bewertungskriterien)\s*:|\Z)',
-            block, re.S | re.IGNORECASE
-        )
-        ideal_answer = ia_match.group(1).strip() if ia_match else ""
+        ideal_answer = sections.get("ideal", "")
 
         # RUBRIC (JSON or bullet list)
         rubric_list: List[Dict[str, int]] = []
-        r_match = re.search(
-            r'(?:^|\n)(?:Rubric|Bewertungskriterien)\s*:\s*(.*)$',
-            block, re.S | re.IGNORECASE
-        )
-        if r_match:
-            rubric_text = r_match.group(1).strip()
-            # Try JSON first
-            try:
-                parsed = json.loads(rubric_text)
-                if isinstance(parsed, dict) and "criteria" in parsed:
-                    for crit in parsed.get("criteria", []):
-                        if isinstance(crit, dict) and "criteria" in crit and "points" in crit:
-                            rubric_list.append({"criteria": crit["criteria"], "points": int(crit["points"])})
-                elif isinstance(parsed, list):
-                    for item in parsed:
-                        if isinstance(item, dict) and "criteria" in item and "points" in item:
-                            rubric_list.append({"criteria": item["criteria"], "points": int(item["points"])})
-            except Exception:
+        if "rubric" in sections:
+            rubric_text = sections["rubric"]
+            # JSON only when it looks like JSON; bullet lists (the common case) skip
+            # the failed decode and exception entirely.
+            parsed = None
+            if rubric_text[:1] in ("{", "["):
+                try:
+                    parsed = json.loads(rubric_text)
+                    if isinstance(parsed, dict) and "criteria" in parsed:
+                        for crit in parsed.get("criteria", []):
+                            if isinstance(crit, dict) and "criteria" in crit and "points" in crit:
+                                rubric_list.append({"criteria": crit["criteria"], "points": int(crit["points"])})
+                    elif isinstance(parsed, list):
+                        for item in parsed:
+                            if isinstance(item, dict) and "criteria" in item and "points" in item:
+                                rubric_list.append({"criteria": item["criteria"], "points": int(item["points"])})
+                except (ValueError, TypeError):
+                    parsed = None
+            if parsed is None:
                 # Bullet list lines like: "- Correct def (2 pts)"
-                for line in rubric_text.splitlines():
-                    line = line.strip()
-                    if not line or not line.lstrip().startswith('-'):
-                        continue
-                    mpts = re.search(r'\(\s*(\d+(?:\.\d+)?)\s*(?:points?|pts?|pt|Punkte?)\s*\)\s*$', line, re.IGNORECASE)
+                for bullet in _RUBRIC_BULLET_LINE_RE.finditer(rubric_text):
+                    line = bullet.group().strip()
+                    mpts = _BULLET_PTS_RE.search(line)
                     pts = float(mpts.group(1)) if mpts else 0.0
-                    crit = re.sub(r'^\s*-\s*', '', line)
-                    crit = re.sub(r'\s*\(\s*\d+(?:\.\d+)?\s*(?:points?|pts?|pt|Punkte?)\s*\)\s*$', '', crit).strip()
+                    crit = _STRIP_BULLET_RE.sub('', line).strip()
                     rubric_list.append({"criteria": crit, "points": int(pts)})
 
         questions.append({
@@ -163,6 +206,24 @@ def parse_professor_pdf(text: str) -> Dict:
 
 
 # =================== SINGLE-PDF (MULTI-STUDENT) PARSER ========================
+def _next_line_match(pattern: "re.Pattern[str]", text: str, pos: int = 0):
+    """
+    First match of `pattern` anchored at a line start at or after `pos`, i.e. what
+    a (?m)^ search would find, but hopping from newline to newline with str.find.
+    """
+    if pos and text[pos - 1] != "\n":
+        pos = text.find("\n", pos) + 1
+        if not pos:
+            return None
+    while True:
+        m = pattern.match(text, pos)
+        if m:
+            return m
+        pos = text.find("\n", pos) + 1
+        if not pos:
+            return None
+
+
 def parse_student_pdf(text: str) -> Dict[str, Dict[str, str]]:
     """
     For a single uploaded PDF that contains multiple students:
@@ -181,50 +242,52 @@ def parse_student_pdf(text: str) -> Dict[str, Dict[str, str]]:
     text = _clean_invisibles(text)
     students: Dict[str, Dict[str, str]] = {}
 
-    # split by student header, capture the header token
-    parts = re.split(r'(?m)^(Student\s*\d+\s*:|Studierende[rn]?\s*\d+\s*:)\s*', text)
-    for i in range(1, len(parts), 2):
-        label = parts[i].rstrip(':').strip()
-        block = parts[i + 1] if i + 1 < len(parts) else ""
+    # walk student headers; each block runs to the next header
+    hdr = _next_line_match(_STUDENT_HDR_RE, text)
+    while hdr:
+        nxt = _next_line_match(_STUDENT_HDR_RE, text, hdr.end())
+        label = hdr.group(1).rstrip(':').strip()
+        block = text[hdr.end():nxt.start() if nxt else len(text)]
 
         answers: Dict[str, str] = {}
         # capture A1:/F1: until next answer or next student header
-        for m in re.finditer(
-            r'(?ms)^(A\d+|F\d+)\s*:\s*(.*?)(?=^\s*(?:A\d+|F\d+)\s*:|^\s*(?:Student\s*\d+|Studierende[rn]?\s*\d+)\s*:|\Z)',
-            block
-        ):
-            answers[m.group(1)] = m.group(2).strip()
+        pos = 0
+        while key := _next_line_match(_ANSWER_KEY_RE, block, pos):
+            body = key.end()
+            end = _next_line_match(_ANSWER_END_RE, block, body)
+            pos = end.start() if end else len(block)
+            answers[key.group(1)] = block[body:pos].strip()
 
         students[label] = answers
+        hdr = nxt
 
     return students
 
 
 # ==================== ZIP FLOW MULTIMODAL PROCESSOR ===========================
-def process_student_data(content_blocks: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+def process_student_data(full_text: str) -> Dict[str, List[Dict[str, Any]]]:
     """
-    Parses student answers from a list of multimodal content blocks.
+    Parses student answers from the joined text of a student's multimodal blocks.
     This is used for the ZIP flow and remains unchanged.
     """
-    full_text = "\n".join(
-        block.get("content", "") for block in content_blocks if block.get("type") == "text"
-    ).strip()
+    full_text = full_text.strip()
     if not full_text:
         return {}
 
-    # Find markers like Q1 / A1 / Answer 1 / Aufgabe 1 at the start of a line.
-    answer_marker_regex = re.compile(r"(?im)^\s*(?:Q|A|Answer|Aufgabe)\s*(\d+)\s*[:.)]?")
-    markers = list(answer_marker_regex.finditer(full_text))
+    # (start, end, number) per marker; the Match objects are not kept around
+    markers = []
+    m = _next_line_match(_ANSWER_MARKER_RE, full_text)
+    while m:
+        markers.append((m.start(), m.end(), m.group(1)))
+        m = _next_line_match(_ANSWER_MARKER_RE, full_text, m.end())
 
     answers: Dict[str, List[Dict[str, Any]]] = {}
-    for i, match in enumerate(markers):
-        q_num = match.group(1)
-        answer_key = f"A{q_num}"
-        start_pos = match.end()
-        end_pos = markers[i + 1].start() if i + 1 < len(markers) else len(full_text)
+    ends = [start for start, _, _ in markers[1:]]
+    ends.append(len(full_text))
+    for (_, start_pos, q_num), end_pos in zip(markers, ends):
         answer_content = full_text[start_pos:end_pos].strip()
         if answer_content:
-            answers[answer_key] = [{"type": "text", "content": answer_content}]
+            answers[f"A{q_num}"] = [{"type": "text", "content": answer_content}]
     return answers
 
 
@@ -239,32 +302,29 @@ def _normalize_prof_info_for_ui_and_grader(prof_info: Dict[str, Any]) -> Dict[st
     for q in qs:
         # Ideal answer -> blocks + plain text
         ia = q.get("ideal_answer", "")
+        # Parsed/JSON data only ever holds plain dicts, so `type(x) is dict` is
+        # enough here and skips isinstance's subclass check per block/item.
         if isinstance(ia, str):
-            blocks = [{"type": "text", "content": ia.strip()}] if ia.strip() else []
+            ia = ia.strip()
+            blocks = [{"type": "text", "content": ia}] if ia else []
         elif isinstance(ia, list):
-            blocks = []
-            for blk in ia:
-                if isinstance(blk, dict):
-                    if "content" in blk:
-                        blocks.append(blk)
-                    else:
-                        blocks.append({"type": "text", "content": str(blk)})
-                else:
-                    blocks.append({"type": "text", "content": str(blk)})
+            blocks = [
+                blk if type(blk) is dict and "content" in blk else {"type": "text", "content": str(blk)}
+                for blk in ia
+            ]
         else:
             blocks = []
         q["ideal_answer"] = blocks
-        q["ideal_answer_text"] = " ".join(
-            (b.get("content") or "") for b in blocks if isinstance(b, dict)
-        ).strip()
+        q["ideal_answer_text"] = " ".join((b.get("content") or "") for b in blocks).strip()
 
         # Rubric normalize
         rb = q.get("rubric") or []
         if isinstance(rb, dict) and "criteria" in rb:
             rb = rb.get("criteria") or []
         norm = []
+        total = 0
         for item in rb if isinstance(rb, list) else []:
-            if isinstance(item, dict):
+            if type(item) is dict:
                 crit = (item.get("criteria") or item.get("id") or "").strip()
                 pts = item.get("points", 0)
             else:
@@ -274,9 +334,11 @@ def _normalize_prof_info_for_ui_and_grader(prof_info: Dict[str, Any]) -> Dict[st
                 pts = int(round(float(pts)))
             except Exception:
                 pts = 0
+            total += pts
             norm.append({"criteria": crit, "points": pts})
         q["rubric"] = norm
-        q["max_points"] = sum(x["points"] for x in norm) if norm else 0
+        q["rubric_json"] = _RUBRIC_ENCODER.encode(norm)
+        q["max_points"] = total
 
     prof_info["questions"] = qs
     return prof_info
@@ -287,21 +349,28 @@ def seed_multimodal_rag_from_professor(prof_info: Dict, prof_content_blocks: Lis
     vs_instance.index.reset()
     vs_instance.items.clear()
     vs_instance.by_q.clear()
-    for i, block in enumerate(prof_content_blocks):
-        doc_id = f"prof-block-{i}"
-        for q in prof_info.get("questions", []):
-            if qid := q.get("id"):
-                vs_instance.add(doc_id, block['content'], block['type'], {"q_id": qid, "source": "professor"})
-    for q in prof_info.get("questions", []):
-        if not (qid := q.get("id")):
-            continue
+    questions = prof_info.get("questions") or []
+    qids_with_meta = [(qid, q) for q in questions if (qid := q.get("id"))]
+    qids = [qid for qid, _ in qids_with_meta]
+    # Every lecturer block is relevant to every question: store each block once and
+    # file it under all question ids, rather than adding a copy per question.
+    items = []
+    if qids:
+        for i, block in enumerate(prof_content_blocks):
+            items.append((f"prof-block-{i}", block['content'], block['type'], {"source": "professor"}, qids))
+    for qid, q in qids_with_meta:
         if rubric := q.get("rubric"):
-            vs_instance.add(f"{qid}-rubric", json.dumps(rubric, ensure_ascii=False), "text", {"type": "rubric", "q_id": qid})
-        if ideal_blocks := q.get("ideal_answer"):
+            # serialized once during normalization; reseeding reuses it
+            rubric_json = q.get("rubric_json") or _RUBRIC_ENCODER.encode(rubric)
+            items.append((f"{qid}-rubric", rubric_json, "text", {"type": "rubric", "q_id": qid}))
+        ideal_blocks = q.get("ideal_answer")
+        if ideal_blocks:
             # store the normalized ideal answer blocks as text for retrieval
             ideal_str = " ".join(b.get("content","") for b in ideal_blocks if isinstance(b, dict))
             if ideal_str.strip():
-                vs_instance.add(f"{qid}-ideal", ideal_str, "text", {"type": "ideal", "q_id": qid})
+                items.append((f"{qid}-ideal", ideal_str, "text", {"type": "ideal", "q_id": qid}))
+    # one batch: the store indexes everything in a single pass
+    vs_instance.add_many(items)
 
 
 # ============================== UI & LOGIC ====================================
@@ -332,8 +401,10 @@ if st.button("🚦 Start Grading", disabled=not (prof_pdf and submission_file),
     # ---- Professor PDF ----
     try:
         with st.spinner("Processing Lecturer PDF (expecting 'Professor' headings)..."):
-            pdf_bytes = prof_pdf.getvalue()
-            prof_content_blocks = extract_multimodal_content_from_pdf(BytesIO(pdf_bytes))
+            # UploadedFile is a BytesIO itself; the parser seeks/reads it directly.
+            prof_content_blocks = extract_multimodal_content_from_pdf(prof_pdf)
+            # A list, not a generator: str.join builds a list from a generator anyway,
+            # so handing it one directly is the cheaper form.
             prof_text = "\n".join([b['content'] for b in prof_content_blocks if b['type'] == 'text'])
             prof_info = parse_professor_pdf(prof_text)
 
@@ -345,7 +416,12 @@ if st.button("🚦 Start Grading", disabled=not (prof_pdf and submission_file),
             prof_info = _normalize_prof_info_for_ui_and_grader(prof_info)
 
             st.session_state["prof_data"] = prof_info
+            # Question ids and their answer keys (Q<n> -> A<n>), derived once per parse
+            st.session_state["prof_qids"] = [q["id"] for q in prof_info["questions"]]
+            st.session_state["prof_akeys"] = [qid.replace("Q", "A") for qid in st.session_state["prof_qids"]]
 
+            # The store was just rebuilt here; make the results page reseed it.
+            st.session_state.pop("rag_seed_signature", None)
             if multimodal_vs_instance:
                 seed_multimodal_rag_from_professor(prof_info, prof_content_blocks, multimodal_vs_instance)
                 st.write("✅ Lecturer PDF processed and RAG seeded.")
@@ -366,20 +442,24 @@ if st.button("🚦 Start Grading", disabled=not (prof_pdf and submission_file),
                 # ZIP FLOW: UNCHANGED
                 st.session_state["upload_type"] = "ilias_zip"
                 ingest_result: IngestResult = parse_ilias_zip(
-                    BytesIO(submission_file.getvalue()),
+                    submission_file,
                     multimodal_extractor=extract_multimodal_content_from_pdf
                 )
                 st.session_state["ilias_ingest_result"] = ingest_result
                 for student_folder in ingest_result.student_folders:
                     student_id = student_folder.email or student_folder.raw_folder
-                    all_student_blocks = [block for f in student_folder.files for block in f.multimodal_content]
-                    students_data[student_id] = process_student_data(all_student_blocks)
+                    students_data[student_id] = process_student_data("\n".join(
+                        block.get("content", "")
+                        for f in student_folder.files
+                        for block in f.multimodal_content
+                        if block.get("type") == "text"
+                    ))
             else:
                 # SINGLE PDF FLOW: handle multiple students in one file
                 st.session_state["upload_type"] = "pdf"
 
                 # 1) Extract raw text from the uploaded single PDF
-                single_pdf_text = extract_text_from_pdf(BytesIO(submission_file.getvalue()))
+                single_pdf_text = extract_text_from_pdf(submission_file)
 
                 # 2) Split into students -> { "Student 1": {"A1":"...", ...}, "Student 2": {...}, ... }
                 per_student_answers = parse_student_pdf(single_pdf_text)
@@ -393,12 +473,12 @@ if st.button("🚦 Start Grading", disabled=not (prof_pdf and submission_file),
                     }
 
         # ---- Validation: each student should have entries for every Qn ----
-        qids = [q["id"] for q in st.session_state["prof_data"].get("questions", [])]
+        qid_akeys = list(zip(st.session_state["prof_qids"], st.session_state["prof_akeys"]))
         for student_id, answers in students_data.items():
-            for qid in qids:
-                akey = qid.replace("Q", "A")
-                if akey not in answers or not answers[akey]:
-                    errors.append(f"**{student_id}** missing content for `{qid}` (`{akey}`).")
+            errors.extend(
+                f"**{student_id}** missing content for `{qid}` (`{akey}`)."
+                for qid, akey in qid_akeys if not answers.get(akey)
+            )
 
         if errors:
             st.error("❌ Validation failed:")
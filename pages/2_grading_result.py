@@ -23,10 +23,22 @@ import streamlit as st
 st.set_page_config(page_title="⚖️ Grading Results", layout="wide")
 
 import pandas as pd
-import json, re, difflib, hashlib, io, zipfile, time, functools, importlib
+import json, re, difflib, hashlib, io, zipfile, time, functools, importlib, itertools, copy
 from typing import List, Dict, Any, Tuple
 from PIL import Image
 import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+import pickle
+
+try:
+    import xxhash  # optional fast non-cryptographic hash
+except Exception:
+    xxhash = None  # type: ignore
+
+try:
+    import orjson  # optional C-accelerated JSON
+except Exception:
+    orjson = None  # type: ignore
 
 # --- App-specific imports ---
 from database.postgres_handler import PostgresHandler
@@ -34,6 +46,8 @@ from grader_engine.multimodal_rag import retrieve_multimodal_context
 from grader_engine.explainer import generate_explanation
 from rag_utils import seed_rag_from_professor
 from grader_engine.rag_integration import add_correction_example
+from ilias_utils.zip_writer import file_info, write_predeflated
+from utils.content_html import blocks_to_html
 from typing import Optional, Any
 
 # --- Translations (UI strings) ---
@@ -196,27 +210,28 @@ def _blocks_to_plain_text(blocks) -> str:
     blocks = _to_blocks(blocks)
     return " ".join((b.get("content") or "") for b in blocks if isinstance(b, dict)).strip()
 
-def render_content_blocks(title: str, content_blocks):
-    """Tolerant renderer: accepts str | dict | list[dict|str]."""
+def _stored_text(result: Dict, text_key: str, blocks_key: str) -> str:
+    """Plain text precomputed at grading time; derived from the blocks for results that lack it."""
+    if text_key in result:
+        return result[text_key]
+    return _blocks_to_plain_text(result.get(blocks_key, []))
+
+def render_content_blocks(title: str, content_blocks, cache: Optional[Dict[str, str]] = None, cache_key: str = ""):
+    """
+    Tolerant renderer: accepts str | dict | list[dict|str].
+    With a `cache` dict the HTML is built once per `cache_key` and reused on reruns.
+    """
     st.markdown(f"**{title}**")
-    blocks = _to_blocks(content_blocks)
-    if not blocks:
+    body = cache.get(cache_key) if cache is not None else None
+    if body is None:
+        blocks = _to_blocks(content_blocks)
+        body = blocks_to_html(blocks) if blocks else ""
+        if cache is not None:
+            cache[cache_key] = body
+    if not body:
         st.info("No content provided for this section.")
         return
-    for item in blocks:
-        content_type = (item.get('type') or item.get('content_type') or "text")
-        content = item.get('content')
-        if content_type in (None, "text"):
-            st.write(content or "")
-        elif content_type == "image":
-            try:
-                st.image(content, use_container_width=True)
-            except Exception:
-                st.code(f"[image] {str(content)[:120]}")
-        elif content_type == "code":
-            st.code(content or "", language=item.get("lang") or item.get("language"))
-        else:
-            st.code(json.dumps(item, ensure_ascii=False, indent=2))
+    st.markdown(body, unsafe_allow_html=True)
 
 def _make_serializable(obj):
     try:
@@ -225,6 +240,19 @@ def _make_serializable(obj):
     except TypeError:
         return str(obj)
 
+def _json_bytes(obj, sort_keys: bool = False) -> bytes:
+    """Encode in one pass; leaves JSON can't represent (image bytes, ...) become str()."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=str, option=option)
+        except TypeError:
+            pass  # e.g. ints beyond 64 bits; let stdlib handle it
+    return json.dumps(obj, sort_keys=sort_keys, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def _safe_dumps(obj) -> str:
+    return _json_bytes(obj).decode("utf-8")
+
 def _dedupe_feedback(text: str) -> str:
     if not text:
         return text
@@ -244,47 +272,204 @@ def _is_valid_email(value: str) -> bool:
 def _total_possible(rubric_list: List[Dict[str, Any]]) -> int:
     return sum(int(r.get("points", 0)) for r in rubric_list or [])
 
-def _signature(prof_data: Dict, students_data: Dict, language: str) -> str:
-    payload = json.dumps(
-        {"prof": prof_data, "students": _make_serializable(students_data), "lang": language},
-        sort_keys=True
-    )
-    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+def _fingerprint(payload: bytes) -> str:
+    # Only a cache key, so no cryptographic hash needed: xxh3 when installed, else blake2b.
+    if xxhash is not None:
+        return xxhash.xxh3_128_hexdigest(payload)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+def _payload_fingerprint(obj) -> str:
+    # Unserializable leaves are stringified, so the payload is encoded once
+    # instead of trial-encoding it first.
+    return _fingerprint(_json_bytes(obj, sort_keys=True))
+
+def _signature(prof_sig: str, students_data: Dict, language: str) -> str:
+    """
+    Cache key for a grading run, combined from per-student fingerprints.
+    A student's digest is reused while their answers are still the same dict
+    object (uploads build new ones), so reruns don't re-encode every submission.
+    """
+    previous = st.session_state.get("student_digests", {})
+    digests = {}
+    for sid, answers in students_data.items():
+        hit = previous.get(sid)
+        if hit is None or hit[0] is not answers:
+            hit = (answers, _payload_fingerprint([sid, answers]))
+        digests[sid] = hit
+    st.session_state["student_digests"] = digests
+    return _fingerprint("\n".join([prof_sig, language, *(d for _, d in digests.values())]).encode("utf-8"))
+
+def _results_summary(students_data: Dict, q_possible: List[Tuple[str, int]], grading_results: Dict) -> pd.DataFrame:
+    """Student x question "score/possible" table plus a Total column, built with one pivot.
+
+    `q_possible` is [(question id, possible points), ...] in question order.
+    """
+    q_ids = [q_id for q_id, _ in q_possible]
+    cells = [
+        (student, q_id, sum(int(it["score"]) for it in grading_results[k]["rubric_scores"]), ps)
+        for student in students_data for q_id, ps in q_possible
+        if (k := f"{student}_{q_id}") in grading_results
+    ]
+    df = pd.DataFrame(cells, columns=["Student", "Q", "sc", "ps"])
+    index = pd.Index(list(students_data), name="Student")
+    if df.empty:
+        summary = pd.DataFrame(index=index)
+    else:
+        df["cell"] = df["sc"].astype(str) + "/" + df["ps"].astype(str)
+        graded = set(df["Q"])
+        summary = df.pivot_table(index="Student", columns="Q", values="cell", aggfunc="last").reindex(
+            index=index, columns=[q_id for q_id in dict.fromkeys(q_ids) if q_id in graded])
+        summary.columns.name = None
+    totals = df.groupby("Student")[["sc", "ps"]].sum().reindex(index, fill_value=0)
+    summary["Total"] = totals["sc"].astype(str) + "/" + totals["ps"].astype(str)
+    return summary
 
 def update_score_callback(student, q_id, rubric_idx, slider_key):
     if slider_key in st.session_state:
         st.session_state["grading_cache"]['results'][f"{student}_{q_id}"]['rubric_scores'][rubric_idx]['score'] = st.session_state[slider_key]
 
+# st.fragment (Streamlit >= 1.37; experimental_ before that) reruns only the wrapped
+# region on widget events, so editing a result skips the summary/grading pass above it.
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+@_fragment
+def _detail_editor(sel_st: str, sel_q: str, detail_key: str, stored: Dict, question_text: str, language: str, T: Dict, db, my_email: str):
+    """Rubric sliders, feedback, explanation, save/share and debug for one student/question."""
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown(T["rubric_breakdown"])
+        for idx, crit in enumerate(stored["rubric_list"]):
+            init_score = int(stored["rubric_scores"][idx]["score"])
+            max_pts = int(crit.get("points", 0)); slider_key = f"slider_{detail_key}_{idx}"
+            st.slider(f'{crit["criteria"]} (Points: {max_pts})', min_value=0, max_value=max_pts, value=init_score, key=slider_key, on_change=update_score_callback, args=(sel_st, sel_q, idx, slider_key))
+        total_now = sum(int(x["score"]) for x in stored["rubric_scores"])
+        st.info(f"**Total Score: {total_now} / {_total_possible(stored['rubric_list'])}**")
+
+    with c2:
+        st.markdown(T["feedback"])
+        fb_key = f"fb_{detail_key}"
+        fb_text = st.text_area("Feedback", value=stored["feedback"]["text"], key=fb_key, height=300, label_visibility="collapsed")
+        # Stored feedback is already deduplicated; only edited text needs another pass.
+        if fb_text != stored["feedback"]["text"]:
+            stored["feedback"]["text"] = _dedupe_feedback(fb_text)
+
+    # 💡 Explanation button
+    if st.button(T.get("explain_button", "💡 Explanation"), key=f"explain_{detail_key}"):
+        assigned_score = sum(int(item["score"]) for item in stored.get("rubric_scores", []))
+        student_answer_text = _stored_text(stored, "student_answer_text", "student_answer_content")
+        with st.spinner("Generating explanation..."):
+            explanation = generate_explanation(
+                question=stored.get("question", question_text),
+                ideal_answer=_stored_text(stored, "ideal_answer_text", "ideal_answer"),
+                rubric=stored.get("rubric_list", []),
+                student_answer=student_answer_text,
+                assigned_score=assigned_score,
+                language=language
+            )
+        st.subheader(T.get("explain_button", "💡 Explanation"))
+        st.text_area("Detailed Explanation", explanation, height=200, key=f"exp_{detail_key}")
+
+    if st.button(T["save_changes"], key=f"save_{detail_key}", type="primary"):
+        new_total_score = sum(item["score"] for item in stored["rubric_scores"])
+        db.update_grading_result_with_correction(grading_result_id=stored["db_id"], new_score=float(new_total_score), new_feedback=stored["feedback"]["text"], editor_id=my_email)
+        add_correction_example(
+            question_id=stored.get("question_id") or sel_q,
+            question_text=stored.get("question", ""),
+            student_answer=_stored_text(stored, "student_answer_text", "student_answer_content"),
+            feedback=stored["feedback"]["text"],
+            editor_id=my_email
+        )
+        stored["feedback"]["original"] = stored["feedback"]["text"]
+        for item in stored["rubric_scores"]: item["original_score"] = item["score"]
+        st.success("✅ Changes saved!")
+
+    with st.expander(T.get("share_expander", "Share with a colleague")):
+        share_email_key = f"share_email_{detail_key}"
+        share_email = st.text_input(T.get("share_email_input", "Colleague email:"), key=share_email_key)
+        share_button_disabled = stored.get("db_id") is None
+        if share_button_disabled:
+            st.info(T.get("share_disabled_info", "Save this result before sharing it."))
+        if st.button(T.get("share_button", "Share"), key=f"share_btn_{detail_key}", disabled=share_button_disabled):
+            if not _is_valid_email(share_email):
+                st.warning(T.get("invalid_email", "Please provide a valid email address."))
+            else:
+                try:
+                    db.share_result(owner_email=my_email, target_email=share_email, result_id=stored["db_id"])
+                    st.success(T.get("share_success", "Result shared successfully!"))
+                    share_email = ""
+                except Exception as exc:
+                    st.error(f"{T.get('share_error', 'Failed to share the result.')} ({exc})")
+
+    # Debug expander
+    with st.expander(T["debug_title"]):
+        st.json(stored.get("llm_debug", {}))
+
+# Alias keys per normalized field, in priority order (first truthy value wins).
+_TITLE_KEYS = ("title", "document_title", "name")
+_SOURCE_KEYS = ("source", "collection", "dataset", "origin")
+_URL_KEYS = ("url", "link", "href")
+_PAGE_KEYS = ("page", "page_number", "pageno")
+_SCORE_KEYS = ("score", "_score", "similarity", "relevance")
+_SNIPPET_KEYS = ("snippet", "preview", "text", "content", "chunk")
+
+def _first(item: Dict, keys: Tuple[str, ...], default=""):
+    for k in keys:
+        v = item.get(k)
+        if v:
+            return v
+    return default
+
 def _normalize_rag_results(raw_results) -> List[Dict[str, Any]]:
     """Normalize potential RAG result formats into {title, source, url, page, score, snippet}."""
     norm = []
     if not raw_results:
         return norm
     for item in raw_results:
-        title = item.get("title") or item.get("document_title") or item.get("name") or ""
-        source = item.get("source") or item.get("collection") or item.get("dataset") or item.get("origin") or ""
-        url = item.get("url") or item.get("link") or item.get("href") or ""
-        page = item.get("page") or item.get("page_number") or item.get("pageno") or None
-        score = item.get("score") or item.get("_score") or item.get("similarity") or item.get("relevance") or None
-        snippet = item.get("snippet") or item.get("preview") or item.get("text") or item.get("content") or item.get("chunk") or ""
-        try:
-            page_val = int(page) if page is not None and str(page).isdigit() else page
-        except Exception:
+        page = _first(item, _PAGE_KEYS, None)
+        score = _first(item, _SCORE_KEYS, None)
+        # Numbers are the common case; only strings need the digit checks.
+        if page is None or type(page) is int:
             page_val = page
-        try:
-            score_val = float(score) if isinstance(score, (int, float)) or str(score).replace('.', '', 1).isdigit() else score
-        except Exception:
-            score_val = score
+        else:
+            try:
+                page_val = int(page) if str(page).isdigit() else page
+            except Exception:
+                page_val = page
+        if isinstance(score, (int, float)):
+            score_val = float(score)
+        else:
+            try:
+                score_val = float(score) if str(score).replace('.', '', 1).isdigit() else score
+            except Exception:
+                score_val = score
         norm.append({
-            "title": str(title)[:200],
-            "source": str(source)[:120],
-            "url": str(url)[:300],
+            "title": str(_first(item, _TITLE_KEYS))[:200],
+            "source": str(_first(item, _SOURCE_KEYS))[:120],
+            "url": str(_first(item, _URL_KEYS))[:300],
             "page": page_val,
             "score": score_val,
-            "snippet": str(snippet)[:600]
+            "snippet": str(_first(item, _SNIPPET_KEYS))[:600]
         })
     return norm
 
+# ---------------- Lazy grader/export loaders ----------------
+# Resolved on first use and memoized, so worker threads get the callable from a
+# cache instead of going through importlib (and its import lock) per task.
+@functools.lru_cache(maxsize=None)
+def _get_code_grader():
+    return importlib.import_module("grader_engine.code_grader").grade_code
+
+@functools.lru_cache(maxsize=None)
+def _get_text_grader():
+    return importlib.import_module("grader_engine.multimodal_grader").grade_answer_multimodal
+
+@functools.lru_cache(maxsize=None)
+def _get_feedback_pdf_builder():
+    return importlib.import_module("ilias_utils.pdf_feedback").create_pdf_deflated
+
+# Only what FeedbackPDFGenerator reads from a result; keeps pool payloads small.
+_PDF_RESULT_KEYS = ("question", "rubric_scores", "rubric_list", "feedback", "ideal_answer", "student_answer_content")
+
 # ---------------- Grading task (single answer) ----------------
 def grade_single_answer_task(student_id: str, q: Dict, student_answers: Dict, language: str, T: Dict, rag_context_map: Dict):
     """
@@ -296,6 +481,7 @@ def grade_single_answer_task(student_id: str, q: Dict, student_answers: Dict, la
     # ✅ Map Q# -> A# for lookup (was causing all zeros before)
     ans_key = q["id"].replace("Q", "A", 1)
     stud_ans_content = student_answers.get(ans_key, [])
+    stud_blocks = _to_blocks(stud_ans_content)
 
     # Normalize ideal answer for both UI (blocks) and grader (plain string)
     ideal_blocks = _to_blocks(q.get("ideal_answer", []))
@@ -317,10 +503,9 @@ def grade_single_answer_task(student_id: str, q: Dict, student_answers: Dict, la
     if not stud_ans_content:
         pass
     elif is_code_question:
-        code_mod = importlib.import_module("grader_engine.code_grader")
-        grade_code = getattr(code_mod, "grade_code")
+        grade_code = _get_code_grader()
 
-        student_code = next((b.get('content', '') for b in _to_blocks(stud_ans_content) if b.get('type') == 'text'), '')
+        student_code = next((b.get('content', '') for b in stud_blocks if b.get('type') == 'text'), '')
         tests = q.get('tests', [])
         total_award, rubric_breakdown, details = grade_code(
             student_code=student_code, tests=tests, rubric=rubric_list
@@ -360,14 +545,13 @@ def grade_single_answer_task(student_id: str, q: Dict, student_answers: Dict, la
             ).strip()
         )
 
-        text_mod = importlib.import_module("grader_engine.multimodal_grader")
-        grade_answer_multimodal = getattr(text_mod, "grade_answer_multimodal")
+        grade_answer_multimodal = _get_text_grader()
 
         out = grade_answer_multimodal(
             question=q.get('question', ''),
             ideal_answer=ideal_text,                 # ✅ pass plain text to grader
             rubric=rubric_list,
-            student_answer_blocks=_to_blocks(stud_ans_content),
+            student_answer_blocks=stud_blocks,
             multimodal_context=ctx_items,
             language=language,
             return_debug=True
@@ -383,7 +567,9 @@ def grade_single_answer_task(student_id: str, q: Dict, student_answers: Dict, la
         "question_id": q.get("id"),
         "question": q.get("question",""),
         "ideal_answer": ideal_blocks,              # ✅ store normalized blocks for UI
-        "student_answer_content": _to_blocks(stud_ans_content),
+        "ideal_answer_text": ideal_text,
+        "student_answer_content": stud_blocks,
+        "student_answer_text": _blocks_to_plain_text(stud_blocks),
         "rubric_list": rubric_list,
         "rubric_scores": [
             {"criteria": a["criteria"], "score": int(a.get("score", 0)), "original_score": int(a.get("score", 0))}
@@ -412,48 +598,112 @@ def grading_result_page():
     if not prof_data or not students_data: st.warning(T["no_data"]); return
 
     st.title(T["page_title"])
-    seed_rag_from_professor(prof_data)
+    # Reseed (and drop cached retrievals) only when the professor payload changes;
+    # Streamlit reruns this page on every widget interaction.
+    prof_sig = _payload_fingerprint(prof_data)
+    if st.session_state.get("rag_seed_signature") != prof_sig:
+        seed_rag_from_professor(prof_data)
+        st.session_state["rag_seed_signature"] = prof_sig
+        st.session_state["rag_context_cache"] = {}
+    rag_cache = st.session_state.setdefault("rag_context_cache", {})
+    # Possible points depend only on the rubric, so they are summed once per
+    # professor payload and shared by the summary table and the export; the
+    # id index (first question wins, like a scan would) serves the detail view.
+    if st.session_state.get("question_index", (None,))[0] != prof_sig:
+        q_by_id = {}
+        for q in prof_data["questions"]:
+            q_by_id.setdefault(q["id"], q)
+        st.session_state["question_index"] = (
+            prof_sig, [(q["id"], _total_possible(q.get("rubric", []))) for q in prof_data["questions"]], q_by_id)
+    _, q_possible, q_by_id = st.session_state["question_index"]
 
-    sig = _signature(prof_data, students_data, language)
+    sig = _signature(prof_sig, students_data, language)
     if st.session_state.get("grading_cache", {}).get("signature") != sig:
         start_time = time.time()
         grading_results = {}
         tasks = [(sid, q, ans) for sid, ans in students_data.items() for q in prof_data["questions"]]
         progress_bar = st.progress(0, text="Starting...")
 
-        rag_context_map = {}
-        with st.spinner(T["retrieving_context"]):
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                future_to_q = {executor.submit(retrieve_multimodal_context, q_id=q['id'], question=q['question']): q for q in prof_data["questions"]}
-                for future in concurrent.futures.as_completed(future_to_q):
-                    q = future_to_q[future]
-                    try: rag_context_map[q['id']] = future.result()
-                    except Exception as e:
-                        st.error(f"Vector search failed for q_id={q['id']}. Error: {e}")
-                        rag_context_map[q['id']] = {}
+        # Retrieval results are kept per (q_id, question) for the seeded store, so a
+        # regrade (new students/language, same professor data) skips the vector search.
+        rag_context_map = {q['id']: rag_cache[(q['id'], q['question'])] for q in prof_data["questions"] if (q['id'], q['question']) in rag_cache}
+        ready_qs = [q for q in prof_data["questions"] if q['id'] in rag_context_map]
+        missing_qs = [q for q in prof_data["questions"] if q['id'] not in rag_context_map]
 
         tasks_done = 0
+        future_to_task = {}
+        # Students whose answer is identical to one already submitted for the same
+        # question share that task's grade instead of another grader call.
+        future_copies = {}
         with st.spinner(T["grading_in_parallel"].format(task_count=len(tasks))):
             with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
-                future_to_task = {executor.submit(grade_single_answer_task, sid, q, ans, language, T, rag_context_map): (sid, q) for sid, q, ans in tasks}
+                # A question's answers only need that question's context, so grading
+                # starts per question as soon as its retrieval is in, overlapping the
+                # remaining searches instead of waiting for all of them.
+                def submit_grading(q):
+                    nonlocal tasks_done
+                    ans_key = q["id"].replace("Q", "A", 1)
+                    by_answer = {}
+                    for sid, ans in students_data.items():
+                        if not ans.get(ans_key):
+                            # Unanswered: the task only builds its zero-score result, no
+                            # grader call, so do that here rather than occupy a worker.
+                            key, result_data = grade_single_answer_task(sid, q, ans, language, T, rag_context_map)
+                            grading_results[key] = result_data
+                            tasks_done += 1
+                            continue
+                        answer_fp = _payload_fingerprint(ans[ans_key])
+                        if answer_fp in by_answer:
+                            future_copies.setdefault(by_answer[answer_fp], []).append(sid)
+                            continue
+                        future = executor.submit(grade_single_answer_task, sid, q, ans, language, T, rag_context_map)
+                        future_to_task[future] = (sid, q)
+                        by_answer[answer_fp] = future
+
+                for q in ready_qs:
+                    submit_grading(q)
+                if missing_qs:
+                    with st.spinner(T["retrieving_context"]):
+                        # The store is resolved here: pool threads can't read st.session_state.
+                        vs = st.session_state.get("multimodal_vs")
+                        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as rag_executor:
+                            future_to_q = {rag_executor.submit(retrieve_multimodal_context, q_id=q['id'], question=q['question'], vs=vs): q for q in missing_qs}
+                            for future in concurrent.futures.as_completed(future_to_q):
+                                q = future_to_q[future]
+                                try:
+                                    rag_context_map[q['id']] = rag_cache[(q['id'], q['question'])] = future.result()
+                                except Exception as e:
+                                    st.error(f"Vector search failed for q_id={q['id']}. Error: {e}")
+                                    rag_context_map[q['id']] = {}
+                                submit_grading(q)
+
                 for future in concurrent.futures.as_completed(future_to_task):
+                    sid, q = future_to_task[future]
                     try:
                         key, result_data = future.result()
                         grading_results[key] = result_data
-                        tasks_done += 1
+                        for dup_sid in future_copies.get(future, ()):
+                            # Results are edited per student later, so each gets its own copy.
+                            dup = copy.deepcopy(result_data)
+                            dup["student_id"] = dup_sid
+                            grading_results[f"{dup_sid}_{q['id']}"] = dup
+                        tasks_done += 1 + len(future_copies.get(future, ()))
                         progress_bar.progress(int(100 * tasks_done / max(1, len(tasks))), text=f"Graded {tasks_done}/{len(tasks)}")
                     except Exception as exc:
-                        sid, q = future_to_task[future]
-                        st.error(f"Error grading Q {q['id']} for {sid}: {exc}")
+                        for failed_sid in (sid, *future_copies.get(future, ())):
+                            st.error(f"Error grading Q {q['id']} for {failed_sid}: {exc}")
 
-        for key, result in grading_results.items():
+        # One upsert batch for the whole run instead of a round-trip per answer.
+        db_rows = []
+        for result in grading_results.values():
             total_score = sum(s['score'] for s in result['rubric_scores'])
-            student_answer_str = json.dumps(_make_serializable(result['student_answer_content']))
-            db_id = db.insert_or_update_grading_result(
+            db_rows.append(dict(
                 student_id=result['student_id'], professor_id=my_email, course=prof_data.get("course", ""),
                 semester=prof_data.get("session", ""), assignment_no=prof_data.get("assignment_no", ""),
-                question=result["question"], student_answer=student_answer_str, language=language,
-                old_score=total_score, new_score=total_score, old_feedback=result["feedback"]["text"], new_feedback=result["feedback"]["text"])
+                question=result["question"], student_answer=_safe_dumps(result['student_answer_content']),
+                language=language, old_score=total_score, new_score=total_score,
+                old_feedback=result["feedback"]["text"], new_feedback=result["feedback"]["text"]))
+        for result, db_id in zip(grading_results.values(), db.bulk_insert_or_update_grading_results(db_rows)):
             result['db_id'] = db_id
 
         st.session_state["grading_cache"] = {"signature": sig, "results": grading_results}
@@ -463,21 +713,8 @@ def grading_result_page():
     grading_results = st.session_state["grading_cache"]['results']
 
     st.subheader(T["results_summary"])
-    rows = []
-    for student in students_data:
-        tot_sc = tot_ps = 0
-        row = {"Student": student}
-        for q in prof_data["questions"]:
-            k = f"{student}_{q['id']}"
-            if k in grading_results:
-                sc = sum(int(it["score"]) for it in grading_results[k]["rubric_scores"])
-                ps = _total_possible(q.get("rubric",[]))
-                row[q["id"]] = f"{sc}/{ps}"
-                tot_sc += sc
-                tot_ps += ps
-        row["Total"] = f"{tot_sc}/{tot_ps}"
-        rows.append(row)
-    if rows: st.table(pd.DataFrame(rows).set_index("Student"))
+    summary = _results_summary(students_data, q_possible, grading_results)
+    if len(summary.index): st.table(summary)
 
     st.subheader(T["detailed_view"])
     sel_st = st.selectbox("Select Student", list(students_data.keys()))
@@ -489,11 +726,14 @@ def grading_result_page():
     if detail_key not in grading_results: st.error("Could not find grading data for this selection."); st.stop()
     stored = grading_results[detail_key]
 
-    st.markdown(f"**{T['question']}:** {next(q['question'] for q in prof_data['questions'] if q['id']==sel_q)}")
+    question_text = q_by_id[sel_q]['question']
+    st.markdown(f"**{T['question']}:** {question_text}")
 
+    # Rendered HTML lives next to the results, so a regrade drops it with them.
+    html_cache = st.session_state["grading_cache"].setdefault("html", {})
     col1, col2 = st.columns(2)
-    with col1: render_content_blocks(T['ideal_answer'], stored.get('ideal_answer', []))
-    with col2: render_content_blocks(T['student_answer'], stored.get('student_answer_content', []))
+    with col1: render_content_blocks(T['ideal_answer'], stored.get('ideal_answer', []), html_cache, f"{detail_key}_ideal")
+    with col2: render_content_blocks(T['student_answer'], stored.get('student_answer_content', []), html_cache, f"{detail_key}_student")
 
     # --------- RAG TRANSPARENCY UI ----------
     #with st.expander(T["retrieved_context_title"], expanded=False):
@@ -533,115 +773,61 @@ def grading_result_page():
           #  st.text_area("context_text", value=stored.get("rag_context_text", ""), height=250, label_visibility="collapsed")
     # --------- END RAG TRANSPARENCY UI ----------
 
-    c1, c2 = st.columns(2)
-    with c1:
-        st.markdown(T["rubric_breakdown"])
-        for idx, crit in enumerate(stored["rubric_list"]):
-            init_score = int(stored["rubric_scores"][idx]["score"])
-            max_pts = int(crit.get("points", 0)); slider_key = f"slider_{detail_key}_{idx}"
-            st.slider(f'{crit["criteria"]} (Points: {max_pts})', min_value=0, max_value=max_pts, value=init_score, key=slider_key, on_change=update_score_callback, args=(sel_st, sel_q, idx, slider_key))
-        total_now = sum(int(x["score"]) for x in stored["rubric_scores"])
-        st.info(f"**Total Score: {total_now} / {_total_possible(stored['rubric_list'])}**")
-
-    with c2:
-        st.markdown(T["feedback"])
-        fb_key = f"fb_{detail_key}"
-        fb_text = st.text_area("Feedback", value=stored["feedback"]["text"], key=fb_key, height=300, label_visibility="collapsed")
-        stored["feedback"]["text"] = _dedupe_feedback(fb_text)
-
-    # 💡 Explanation button
-    if st.button(T.get("explain_button", "💡 Explanation"), key=f"explain_{detail_key}"):
-        assigned_score = sum(int(item["score"]) for item in stored.get("rubric_scores", []))
-        student_answer_text = _blocks_to_plain_text(stored.get("student_answer_content", []))
-        with st.spinner("Generating explanation..."):
-            explanation = generate_explanation(
-                question=stored.get("question", next(q['question'] for q in prof_data['questions'] if q['id']==sel_q)),
-                ideal_answer=_blocks_to_plain_text(stored.get("ideal_answer", [])),
-                rubric=stored.get("rubric_list", []),
-                student_answer=student_answer_text,
-                assigned_score=assigned_score,
-                language=language
-            )
-        st.subheader(T.get("explain_button", "💡 Explanation"))
-        st.text_area("Detailed Explanation", explanation, height=200, key=f"exp_{detail_key}")
-
-    if st.button(T["save_changes"], key=f"save_{detail_key}", type="primary"):
-        new_total_score = sum(item["score"] for item in stored["rubric_scores"])
-        db.update_grading_result_with_correction(grading_result_id=stored["db_id"], new_score=float(new_total_score), new_feedback=stored["feedback"]["text"], editor_id=my_email)
-        add_correction_example(
-            question_id=stored.get("question_id") or sel_q,
-            question_text=stored.get("question", ""),
-            student_answer=_blocks_to_plain_text(stored.get("student_answer_content", [])),
-            feedback=stored["feedback"]["text"],
-            editor_id=my_email
-        )
-        stored["feedback"]["original"] = stored["feedback"]["text"]
-        for item in stored["rubric_scores"]: item["original_score"] = item["score"]
-        st.success("✅ Changes saved!")
-
-    with st.expander(T.get("share_expander", "Share with a colleague")):
-        share_email_key = f"share_email_{detail_key}"
-        share_email = st.text_input(T.get("share_email_input", "Colleague email:"), key=share_email_key)
-        share_button_disabled = stored.get("db_id") is None
-        if share_button_disabled:
-            st.info(T.get("share_disabled_info", "Save this result before sharing it."))
-        if st.button(T.get("share_button", "Share"), key=f"share_btn_{detail_key}", disabled=share_button_disabled):
-            if not _is_valid_email(share_email):
-                st.warning(T.get("invalid_email", "Please provide a valid email address."))
-            else:
-                try:
-                    db.share_result(owner_email=my_email, target_email=share_email, result_id=stored["db_id"])
-                    st.success(T.get("share_success", "Result shared successfully!"))
-                    share_email = ""
-                except Exception as exc:
-                    st.error(f"{T.get('share_error', 'Failed to share the result.')} ({exc})")
-
-    # Debug expander
-    with st.expander(T["debug_title"]):
-        st.json(stored.get("llm_debug", {}))
+    _detail_editor(sel_st, sel_q, detail_key, stored, question_text, language, T, db, my_email)
 
         # Export all feedback as ZIP of PDFs
     st.markdown("---")
     st.subheader("Download Feedback")
 
-    pdf_mod = importlib.import_module("ilias_utils.pdf_feedback")
-    FeedbackPDFGenerator = getattr(pdf_mod, "FeedbackPDFGenerator")
-    
-     
-    
     ilias_ingest: Optional[Any] = st.session_state.get("ilias_ingest_result")
     assignment_name = (ilias_ingest.assignment_name if ilias_ingest else prof_data.get("assignment_no", "feedback")) or "feedback"
 
     if st.button(T["export_button"], type="primary"):
         with st.spinner("Generating PDF feedback for all students..."):
             zip_buffer = io.BytesIO()
+            create_pdf_deflated = _get_feedback_pdf_builder()
+            # One report job per student: (id, grading data, total score, total possible)
+            jobs = []
+            for student_id in students_data.keys():
+                student_grading_data = []
+                student_total_score = 0
+                student_total_possible = 0
+
+                for q_id, q_points in q_possible:
+                    key = f"{student_id}_{q_id}"
+                    if key not in grading_results: continue
+
+                    result = grading_results[key]
+                    student_grading_data.append({k: result[k] for k in _PDF_RESULT_KEYS if k in result})
+
+                    student_total_score += sum(r.get("score", 0) for r in result.get("rubric_scores", []))
+                    student_total_possible += q_points
+
+                jobs.append((student_id, student_grading_data, student_total_score, student_total_possible))
+
+            def _zip_path(student_id: str) -> str:
+                safe_student_id = re.sub(r'[^a-zA-Z0-9_.-]', '_', student_id)
+                return f"{safe_student_id}/feedback_report.pdf"
+
             with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                for student_id in students_data.keys():
-                    student_grading_data = []
-                    student_total_score = 0
-                    student_total_possible = 0
-
-                    for q in prof_data.get("questions", []):
-                        key = f"{student_id}_{q['id']}"
-                        if key not in grading_results: continue
-                        
-                        result = grading_results[key]
-                        student_grading_data.append(result)
-                        
-                        student_total_score += sum(r.get("score", 0) for r in result.get("rubric_scores", []))
-                        student_total_possible += _total_possible(q.get("rubric", []))
-
-                    pdf_bytes_io = FeedbackPDFGenerator.create_pdf(
-                        student_id=student_id,
-                        assignment_name=assignment_name,
-                        grading_data=student_grading_data,
-                        total_score=student_total_score,
-                        total_possible=student_total_possible
-                    )
-                    
-                    safe_student_id = re.sub(r'[^a-zA-Z0-9_.-]', '_', student_id)
-                    file_path_in_zip = f"{safe_student_id}/feedback_report.pdf"
-                    zip_file.writestr(file_path_in_zip, pdf_bytes_io.getvalue())
+                # reportlab layout is CPU-bound Python, so reports are built (and deflated:
+                # their ASCII85 streams still shrink ~2x) in worker processes; the ZIP is
+                # only appended to here, in student order.
+                written = 0
+                if len(jobs) > 1:
+                    try:
+                        with concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                            ids, datas, scores, possibles = zip(*jobs)
+                            for deflated in executor.map(create_pdf_deflated, ids, itertools.repeat(assignment_name),
+                                                         datas, scores, possibles):
+                                write_predeflated(zip_file, file_info(_zip_path(ids[written])), *deflated)
+                                written += 1
+                    except (BrokenProcessPool, pickle.PicklingError, OSError):
+                        # e.g. no fork support / unpicklable payloads: build the rest in-process
+                        pass
+                for student_id, data, score, possible in jobs[written:]:
+                    write_predeflated(zip_file, file_info(_zip_path(student_id)),
+                                      *create_pdf_deflated(student_id, assignment_name, data, score, possible))
 
             st.session_state["feedback_zip_buffer"] = zip_buffer.getvalue()
             st.success("Generated feedback zip with PDF reports.")
@@ -0,0 +1,30 @@
+from utils.content_html import blocks_to_html
+
+
+def test_text_block_stays_one_verbatim_pre_across_paragraphs():
+    text = "First paragraph with *stars* and _underscores_.\n\n    if a < b and c & d:\n# not a heading\n- not a list\n1. not a list either"
+    out = blocks_to_html([{"type": "text", "content": text}])
+
+    # A <pre> HTML block only ends at </pre>, so the blank line can't hand
+    # the rest of the answer back to the Markdown parser.
+    assert out.startswith("<pre ") and out.endswith("</pre>")
+    assert out.count("</pre>") == 1
+    assert "\n\n    if a &lt; b and c &amp; d:\n# not a heading\n- not a list" in out
+    assert "<div" not in out
+
+
+def test_block_types_render_escaped():
+    out = blocks_to_html([
+        {"type": "code", "content": "x = '</pre>'"},
+        {"type": "image", "content": b"\x89PNGdata"},
+        {"type": "image", "content": "missing.png"},
+        {"type": "table", "content": [1]},
+        {"type": "text", "content": "after\n\nimage"},
+    ])
+    lines = out.split("\n\n")
+
+    assert lines[0] == "<pre><code>x = &#x27;&lt;/pre&gt;&#x27;</code></pre>"
+    assert lines[1].startswith('<img src="data:image/png;base64,')
+    assert "[image] missing.png" in lines[2]
+    assert lines[4].endswith(">after") and lines[5] == "image</pre>"
+    assert out.count("</pre>") == 4
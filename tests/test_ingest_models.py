@@ -0,0 +1,51 @@
+import pytest
+
+from ilias_utils.models import IngestResult, StudentFile, StudentFolder
+
+
+def _sample():
+    return IngestResult(
+        assignment_name="Exercise 3",
+        student_folders=[
+            StudentFolder(
+                raw_folder="Doe_John_j.doe@uni.de_123456",
+                lastname="Doe", firstname="John", email="j.doe@uni.de", matric="123456",
+                files=[
+                    StudentFile("submissions/Doe_John_j.doe@uni.de_123456/a.pdf", "a.pdf", 42, "application/pdf",
+                                [{"type": "text", "content": "answer"}]),
+                    StudentFile("submissions/Doe_John_j.doe@uni.de_123456/b.txt", "b.txt", 3),
+                ],
+                answers={"A1": "text"},
+            ),
+            StudentFolder("Roe Ann", None, None, None, None),
+        ],
+        excel_path="Exercise 3/marks.xlsx",
+    )
+
+
+def test_ingest_result_round_trip():
+    original = _sample()
+    data = original.to_dict()
+
+    restored = IngestResult.from_dict(data)
+
+    assert restored == original
+    assert restored.to_dict() == data
+    assert data["student_folders"][0]["files"][0]["filename"] == "a.pdf"  # input left untouched
+
+
+def test_from_dict_rejects_malformed_manifests():
+    missing = _sample().to_dict()
+    del missing["student_folders"][0]["email"]
+    with pytest.raises(KeyError):
+        IngestResult.from_dict(missing)
+
+    unknown_folder_key = _sample().to_dict()
+    unknown_folder_key["student_folders"][0]["nickname"] = "JD"
+    with pytest.raises(TypeError):
+        IngestResult.from_dict(unknown_folder_key)
+
+    unknown_file_key = _sample().to_dict()
+    unknown_file_key["student_folders"][0]["files"][1]["checksum"] = "abc"
+    with pytest.raises(TypeError):
+        IngestResult.from_dict(unknown_file_key)
@@ -14,3 +14,29 @@ def test_vector_store_add_and_search():
         first = results[0]
         assert "text" in first
         assert "meta" in first
+
+
+def test_vector_store_files_shared_item_under_each_q_id():
+    store = MultimodalVectorStore()
+    store.add("prof-block-0", "Lecture notes on regression", "text", {"source": "professor"}, q_ids=["Q1", "Q2"])
+    store.add("Q1-ideal", "Fit a line to the data", "text", {"type": "ideal", "q_id": "Q1"})
+
+    assert len(store.items) == 2
+    assert store.by_q["Q1"] == [0, 1]
+    assert store.by_q["Q2"] == [0]
+
+
+def test_vector_store_add_many_matches_single_adds():
+    items = [
+        ("prof-block-0", "Lecture notes on regression", "text", {"source": "professor"}, ["Q1", "Q2"]),
+        ("Q1-rubric", "[]", "text", {"type": "rubric", "q_id": "Q1"}),
+        ("Q2-ideal", "Minimise squared error", "text"),
+    ]
+    batched = MultimodalVectorStore()
+    batched.add_many(items)
+    single = MultimodalVectorStore()
+    for item in items:
+        single.add(*item)
+
+    assert batched.items == single.items
+    assert batched.by_q == single.by_q == {"Q1": [0, 1], "Q2": [0]}
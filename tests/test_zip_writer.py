@@ -0,0 +1,54 @@
+import io
+import zipfile
+
+import pytest
+
+from ilias_utils.zip_writer import (
+    deflate_many,
+    deflate_raw,
+    file_info,
+    write_deflated,
+    write_dir,
+    write_predeflated,
+)
+
+
+def test_zip_writer_members_round_trip():
+    payloads = {
+        "a/deflated.txt": b"hello world " * 500,
+        "a/predeflated.bin": bytes(range(256)) * 40,
+        "empty.txt": b"",
+    }
+    many = [b"report %d " % i * 300 for i in range(4)]
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("plain.txt", b"written by zipfile")
+        write_dir(zf, "a")
+        write_deflated(zf, "a/deflated.txt", payloads["a/deflated.txt"])
+        write_predeflated(zf, file_info("a/predeflated.bin"), *deflate_raw(payloads["a/predeflated.bin"]))
+        write_predeflated(zf, file_info("empty.txt"), *deflate_raw(payloads["empty.txt"]))
+        for i, packed in enumerate(deflate_many(many, max_workers=2)):
+            write_predeflated(zf, file_info(f"many/{i}.txt"), *packed)
+        zf.writestr("after.txt", b"zipfile still appends cleanly")
+
+    with zipfile.ZipFile(io.BytesIO(buf.getvalue())) as zf:
+        assert zf.testzip() is None
+        assert zf.read("plain.txt") == b"written by zipfile"
+        assert zf.read("after.txt") == b"zipfile still appends cleanly"
+        for name, data in payloads.items():
+            assert zf.read(name) == data
+        for i, data in enumerate(many):
+            assert zf.read(f"many/{i}.txt") == data
+        assert zf.getinfo("a/").is_dir()
+        assert not zf.getinfo("a/deflated.txt").is_dir()
+        assert zf.namelist()[:2] == ["plain.txt", "a/"]
+
+
+def test_write_predeflated_rejects_open_write_handle():
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        with zf.open("streaming.txt", "w") as handle:
+            handle.write(b"x")
+            with pytest.raises(ValueError):
+                write_deflated(zf, "other.txt", b"y")
@@ -0,0 +1,73 @@
+# File: utils/content_html.py
+"""
+HTML rendering of answer content blocks ([{'type': 'text'|'image'|'code', 'content': ...}]).
+
+The grading detail view emits the result through a single
+st.markdown(..., unsafe_allow_html=True) call. Every block is either a <pre>
+(whose CommonMark HTML block only ends at its closing tag) or an <img> on its
+own line, so escaped content can never end a block early and get re-parsed
+as Markdown.
+"""
+
+import base64
+import html
+import io
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from PIL import Image
+
+_IMAGE_MIME = ((b"\x89PNG", "image/png"), (b"\xff\xd8", "image/jpeg"), (b"GIF8", "image/gif"), (b"RIFF", "image/webp"))
+
+
+def image_src(content) -> Optional[str]:
+    """<img> src for an image block: URLs pass through, files/bytes/PIL images become data URIs."""
+    if isinstance(content, str):
+        if content.startswith(("http://", "https://", "data:")):
+            return content
+        if not os.path.isfile(content):
+            return None
+        with open(content, "rb") as fh:
+            content = fh.read()
+    if isinstance(content, Image.Image):
+        buf = io.BytesIO(); content.save(buf, format="PNG")
+        content = buf.getvalue()
+    if isinstance(content, (bytes, bytearray, memoryview)):
+        data = bytes(content)
+        mime = next((m for sig, m in _IMAGE_MIME if data.startswith(sig)), "image/png")
+        return f"data:{mime};base64,{base64.b64encode(data).decode('ascii')}"
+    return None
+
+
+def _pre(text: str, style: str = "") -> str:
+    attr = f' style="{style}"' if style else ""
+    return f"<pre{attr}>{html.escape(text)}</pre>"
+
+
+def blocks_to_html(blocks: List[Dict[str, Any]]) -> str:
+    """One HTML fragment for a block list, so the detail view emits a single markdown node."""
+    parts = []
+    for item in blocks:
+        content_type = (item.get('type') or item.get('content_type') or "text")
+        content = item.get('content')
+        if content_type in (None, "text"):
+            # Shown verbatim; a <div> would end at the first blank line and the
+            # rest of the answer would be parsed as Markdown.
+            parts.append(_pre(str(content or ""), "white-space:pre-wrap;font-family:inherit"))
+        elif content_type == "image":
+            try:
+                src = image_src(content)
+            except Exception:
+                src = None
+            if src:
+                parts.append(f'<img src="{html.escape(src)}" style="max-width:100%"/>')
+            else:
+                parts.append(_pre(f"[image] {str(content)[:120]}"))
+        elif content_type == "code":
+            parts.append(f"<pre><code>{html.escape(str(content or ''))}</code></pre>")
+        else:
+            parts.append(_pre(json.dumps(item, ensure_ascii=False, indent=2, default=str)))
+    # Blank line between blocks: an <img> HTML block runs until one, and would
+    # otherwise swallow the next <pre> up to its first blank line.
+    return "\n\n".join(parts)